@@ -0,0 +1,70 @@
+"""
+Benchmark DataProcessor's column readers end to end.
+
+Writes a packed float64 file and a three-column CSV file to a temporary
+directory, then times calculate_column_statistics over each reader. The
+reference points are np.fromfile plus sum/var for the binary file, and
+csv.reader feeding calculate_statistics for the CSV file. The files are
+read once beforehand, so the timings are for a warm page cache.
+
+Usage: python benchmarks/bench_column_readers.py [rows]
+"""
+import csv
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "05_advanced"))
+from data_processor import DataProcessor  # noqa: E402
+
+
+def timed(label: str, size: int, func) -> None:
+    """Print how long func takes and the bytes per second that implies."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {elapsed:6.2f} s  {size / elapsed / 1e6:7.0f} MB/s")
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    rng = np.random.default_rng(0)
+    values = rng.uniform(-1000, 1000, rows)
+    processor = DataProcessor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        binary = Path(tmp) / "values.bin"
+        values.tofile(binary)
+        size = binary.stat().st_size
+        binary.read_bytes()
+        print(f"binary column: {rows:,} float64 values, {size / 1e6:.0f} MB")
+        timed("np.fromfile + sum/var", size,
+              lambda: (lambda a: (a.sum(), a.var()))(np.fromfile(binary)))
+        timed("read_binary_column", size,
+              lambda: processor.calculate_column_statistics(processor.read_binary_column(binary)))
+
+        text = Path(tmp) / "values.csv"
+        with text.open("w") as file:
+            file.write("id,price,note\n")
+            file.writelines(f"{i},{value:.3f},item{i % 97}\n" for i, value in enumerate(values))
+        size = text.stat().st_size
+        text.read_bytes()
+        print(f"CSV column: {rows:,} rows, {size / 1e6:.0f} MB")
+
+        def csv_reader():
+            with text.open(newline="") as file:
+                reader = csv.reader(file)
+                next(reader)
+                return processor.calculate_statistics(row[1] for row in reader)
+
+        timed("csv.reader + calculate_statistics", size, csv_reader)
+        timed("read_csv_column", size,
+              lambda: processor.calculate_column_statistics(
+                  processor.read_csv_column(text, "price")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark DataProcessor's parallel processing across worker counts.
+
+Times process_numbers and calculate_statistics against their parallel
+versions for 1..N workers on a list of numeric strings.
+
+Usage: python benchmarks/bench_data_processor.py [values] [max_workers]
+"""
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "05_advanced"))
+from data_processor import DataProcessor  # noqa: E402
+
+
+def timed(func, *args, **kwargs) -> float:
+    """Return how long one call takes, in seconds."""
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    rng = random.Random(0)
+    numbers = [f"{rng.uniform(-1000, 1000):.3f}" for _ in range(count)]
+    processor = DataProcessor()
+    print(f"{count:,} values, {os.cpu_count()} CPUs")
+
+    serial = timed(processor.process_numbers, numbers)
+    print(f"{'process_numbers':<30}     serial: {serial:6.2f} s")
+    for workers in range(1, max_workers + 1):
+        elapsed = timed(processor.process_numbers_parallel, numbers, workers=workers)
+        print(f"{'process_numbers_parallel':<30} {workers:>2} workers: {elapsed:6.2f} s "
+              f"({serial / elapsed:4.2f}x)")
+
+    serial = timed(processor.calculate_statistics, numbers)
+    print(f"{'calculate_statistics':<30}     serial: {serial:6.2f} s")
+    for workers in range(1, max_workers + 1):
+        elapsed = timed(processor.calculate_statistics_parallel, numbers, workers=workers)
+        print(f"{'calculate_statistics_parallel':<30} {workers:>2} workers: {elapsed:6.2f} s "
+              f"({serial / elapsed:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark FileProcessor backups.
+
+Times create_backup against reading and writing the whole file in one go,
+and reports throughput in MB/s and the process's peak RSS after each
+(create_backup runs first, since peak RSS only ever grows). Then times
+create_incremental_backup for a first backup, a repeat of the unchanged
+file, and a backup after a small edit.
+
+Usage: python benchmarks/bench_file_processor.py [size_mb]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "06_system_testing"))
+from file_processor import FileProcessor  # noqa: E402
+
+
+def report(label: str, size: int, elapsed: float) -> None:
+    """Print elapsed time, throughput and peak RSS so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(f"{label:<24} {elapsed:6.2f} s  {size / elapsed / 1e6:8.1f} MB/s  peak RSS {peak:6.0f} MiB")
+
+
+def main() -> None:
+    size = int(sys.argv[1]) * 1024 * 1024 if len(sys.argv) > 1 else 256 * 1024 * 1024
+    processor = FileProcessor()
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.log"
+        with source.open("wb") as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(size // len(block)):
+                f.write(block)
+        print(f"file: {size / 1e6:.0f} MB")
+
+        start = time.perf_counter()
+        backup = processor.create_backup(source)
+        report("create_backup", size, time.perf_counter() - start)
+        backup.unlink()
+
+        start = time.perf_counter()
+        Path(tmp, "naive.bak").write_bytes(source.read_bytes())
+        report("read_bytes/write_bytes", size, time.perf_counter() - start)
+        Path(tmp, "naive.bak").unlink()
+
+        store = Path(tmp) / "store"
+        start = time.perf_counter()
+        processor.create_incremental_backup(source, store)
+        report("incremental, first", size, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        processor.create_incremental_backup(source, store)
+        report("incremental, unchanged", size, time.perf_counter() - start)
+
+        with source.open("r+b") as f:
+            f.seek(size // 2)
+            f.write(b"edited")
+        start = time.perf_counter()
+        processor.create_incremental_backup(source, store)
+        report("incremental, edited", size, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
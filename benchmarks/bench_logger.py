@@ -0,0 +1,77 @@
+"""
+Benchmark Logger call throughput in its sync, async and structured modes.
+
+Each mode logs to a stand-in for stderr: either os.devnull, or a stream
+that sleeps on every write to mimic a slow terminal or a full pipe. The
+time reported is what the calling thread spends in log(). For async mode,
+the time close() takes to drain the queue is reported separately.
+
+Usage: python benchmarks/bench_logger.py [records]
+"""
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "06_system_testing"))
+from logger import AsyncOptions, Logger, LogLevel  # noqa: E402
+
+_names = itertools.count()
+
+
+class SlowStream:
+    """Text stream that sleeps for delay seconds on every write."""
+
+    def __init__(self, target, delay: float):
+        self.target = target
+        self.delay = delay
+
+    def write(self, data: str) -> int:
+        time.sleep(self.delay)
+        return self.target.write(data)
+
+    def flush(self) -> None:
+        self.target.flush()
+
+
+def measure(stream, records: int, **options) -> tuple:
+    """Return (calls/sec seen by the caller, seconds spent in close())."""
+    saved, sys.stderr = sys.stderr, stream
+    try:
+        logger = Logger(f"bench.{next(_names)}", **options)
+    finally:
+        sys.stderr = saved
+    logger.logger.propagate = False
+    start = time.perf_counter()
+    for i in range(records):
+        logger.log(LogLevel.INFO, "Processed order %d", i, user="alice", items=3)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    logger.close()
+    return records / elapsed, time.perf_counter() - start
+
+
+def main() -> None:
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    slow_records = min(records, 5_000)
+    modes = [
+        ("sync", {}),
+        ("async", {"async_options": AsyncOptions()}),
+        ("structured", {"structured": True}),
+        ("structured async", {"structured": True, "async_options": AsyncOptions()}),
+    ]
+    with open(os.devnull, "w") as devnull:
+        print(f"{records} records to /dev/null")
+        for label, options in modes:
+            rate, drain = measure(devnull, records, **options)
+            print(f"  {label:<17} {rate:>10,.0f} calls/s   close {drain:6.2f} s")
+
+        print(f"{slow_records} records to a stream sleeping 1 ms per write")
+        for label, options in modes:
+            rate, drain = measure(SlowStream(devnull, 0.001), slow_records, **options)
+            print(f"  {label:<17} {rate:>10,.0f} calls/s   close {drain:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
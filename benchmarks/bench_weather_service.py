@@ -0,0 +1,85 @@
+"""
+Benchmark WeatherService.get_forecast against a local stub server.
+
+Serves a 14-day hourly forecast payload over HTTP and compares decoding
+the full payload with selecting a few fields.
+
+Usage: python benchmarks/bench_weather_service.py [calls]
+"""
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "04_mocking"))
+from weather_service import WeatherService  # noqa: E402
+
+FIELDS = ["city", "daily.max", "daily.min"]
+
+
+def make_payload(days: int = 14) -> bytes:
+    """Build a forecast shaped like the real API's hourly response."""
+    daily = []
+    for day in range(days):
+        hourly = [
+            {"time": f"d{day}h{hour}", "temp": 10 + hour % 7, "humidity": 60 + hour,
+             "wind": {"speed": 3.5, "direction": "NW"}, "summary": "Partly cloudy " * 4}
+            for hour in range(24)
+        ] * 60  # Minute-level samples make the payload a few megabytes
+        daily.append({"max": 20.0 + day, "min": 10.0 + day, "hourly": hourly})
+    return json.dumps({"city": "London", "daily": daily}).encode()
+
+
+def serve(payload: bytes) -> ThreadingHTTPServer:
+    """Start a stub server answering every GET with payload."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(service: WeatherService, calls: int, **options) -> tuple:
+    """Return mean seconds per call and peak traced memory of one call."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        result = service.get_forecast("London", days=14, **options)
+        assert result is not None
+    elapsed = (time.perf_counter() - start) / calls
+
+    tracemalloc.start()
+    result = service.get_forecast("London", days=14, **options)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, len(json.dumps(result))
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    payload = make_payload()
+    server = serve(payload)
+    service = WeatherService("bench", f"http://127.0.0.1:{server.server_port}")
+    print(f"payload: {len(payload) / 1e6:.1f} MB, {calls} calls each")
+    try:
+        for label, options in [("full", {}), ("fields", {"fields": FIELDS})]:
+            elapsed, peak, kept = measure(service, calls, **options)
+            print(f"{label:>6}: {elapsed * 1000:7.1f} ms/call, "
+                  f"peak {peak / 1e6:6.1f} MB, result {kept / 1e3:8.1f} kB")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 """
 Tests for WeatherService class demonstrating mocking.
 """
+import json
+import threading
 import pytest
+import requests
 from unittest.mock import Mock, patch
-from weather_service import WeatherService
+from weather_service import (
+    WeatherService, CircuitBreaker, CircuitState, RateLimiter
+)
 
 # Test data
 MOCK_API_KEY = "test_api_key"
@@ -74,6 +79,41 @@ def test_get_forecast(weather_service, mocker):
         timeout=5
     )
 
+def test_get_forecast_fields(weather_service, mocker):
+    """Test extracting only selected fields from the forecast payload."""
+    mock_forecast = {
+        "city": MOCK_CITY,
+        "daily": [
+            {"max": 20.5, "min": 11.0, "hourly": [{"temp": 12}] * 24},
+            {"max": 22.0, "min": 13.5, "hourly": [{"temp": 14}] * 24}
+        ]
+    }
+    mock_response = Mock()
+    mock_response.content = json.dumps(mock_forecast).encode()
+    mocker.patch('requests.get', return_value=mock_response)
+
+    forecast = weather_service.get_forecast(MOCK_CITY, days=2, fields=["city", "daily.max"])
+
+    assert forecast == {"city": MOCK_CITY, "daily.max": (20.5, 22.0)}
+    mock_response.json.assert_not_called()
+
+def test_get_forecast_missing_field(weather_service, mocker):
+    """Test that requesting a missing field returns None."""
+    mock_response = Mock()
+    mock_response.content = b'{"daily": [{"max": 20.5}]}'
+    mocker.patch('requests.get', return_value=mock_response)
+
+    assert weather_service.get_forecast(MOCK_CITY, fields=["daily.min"]) is None
+
+@pytest.mark.parametrize("field", ["city.name", "daily.wind.speed"])
+def test_get_forecast_field_through_scalar(weather_service, mocker, field):
+    """Test that a path running into a scalar or null returns None."""
+    mock_response = Mock()
+    mock_response.content = b'{"city": "London", "daily": [{"wind": null}]}'
+    mocker.patch('requests.get', return_value=mock_response)
+
+    assert weather_service.get_forecast(MOCK_CITY, fields=[field]) is None
+
 @pytest.mark.parametrize("api_response,expected", [
     ({"valid": True}, True),
     ({"valid": False}, False)
@@ -102,4 +142,161 @@ def test_update_api_key(weather_service, mocker, api_response, expected):
         f"{MOCK_BASE_URL}/validate",
         json={"api_key": new_key},
         timeout=5
-    )
\ No newline at end of file
+    )
+
+class FakeClock:
+    """Manually advanced clock for time-dependent tests."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_circuit_opens_after_failures(mocker):
+    """Test that the circuit opens and rejects calls without hitting the API."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+    service = WeatherService(MOCK_API_KEY, MOCK_BASE_URL, circuit_breaker=breaker)
+    mock_get = mocker.patch('requests.get', side_effect=requests.ConnectionError("down"))
+
+    assert service.get_current_temperature(MOCK_CITY) is None
+    assert service.get_current_temperature(MOCK_CITY) is None
+    assert breaker.state == CircuitState.OPEN
+
+    # Open circuit returns immediately
+    assert service.get_forecast(MOCK_CITY) is None
+    assert mock_get.call_count == 2
+    assert breaker.metrics["opened"] == 1
+    assert breaker.metrics["rejected"] == 1
+
+def test_circuit_half_open_probe(mocker):
+    """Test that a successful probe after the timeout closes the circuit."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+    service = WeatherService(MOCK_API_KEY, MOCK_BASE_URL, circuit_breaker=breaker)
+    mocker.patch('requests.get', side_effect=requests.Timeout("slow"))
+    assert service.get_current_temperature(MOCK_CITY) is None
+    assert breaker.state == CircuitState.OPEN
+
+    mock_response = Mock()
+    mock_response.json.return_value = {"temperature": 25.5}
+    mocker.patch('requests.get', return_value=mock_response)
+
+    clock.now = 10
+    assert service.get_current_temperature(MOCK_CITY) == 25.5
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.metrics == {"opened": 1, "half_opened": 1, "closed": 1, "rejected": 0}
+
+def test_circuit_failed_probe_reopens():
+    """Test that a failed probe reopens the circuit."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=5, clock=clock)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 5
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.metrics["opened"] == 2
+
+def test_rate_limiter(mocker):
+    """Test that calls beyond the token bucket are rejected."""
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, capacity=2, clock=clock)
+    service = WeatherService(MOCK_API_KEY, MOCK_BASE_URL, rate_limiter=limiter)
+    mock_response = Mock()
+    mock_response.json.return_value = {"temperature": 25.5}
+    mock_get = mocker.patch('requests.get', return_value=mock_response)
+
+    results = [service.get_current_temperature(MOCK_CITY) for _ in range(3)]
+    assert results == [25.5, 25.5, None]
+    assert mock_get.call_count == 2
+    assert limiter.rejected == 1
+
+    # Tokens refill over time
+    clock.now = 0.5
+    assert service.get_current_temperature(MOCK_CITY) == 25.5
+
+def test_rate_limiter_slow_rate():
+    """Test that rates below one call per second still allow calls."""
+    clock = FakeClock()
+    limiter = RateLimiter(rate=0.5, clock=clock)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    clock.now = 2
+    assert limiter.try_acquire()
+
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0.5, capacity=0.5)
+
+def run_concurrently(func, threads=8):
+    """Call func from several threads released at the same moment."""
+    barrier = threading.Barrier(threads)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(func())
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results
+
+def test_circuit_single_probe_across_threads():
+    """Test that concurrent callers get only one half-open probe."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+
+    results = run_concurrently(breaker.allow_request, threads=16)
+    assert results.count(True) == 1
+    assert breaker.metrics["rejected"] == 15
+
+def test_rate_limiter_across_threads():
+    """Test that concurrent callers never take more tokens than the bucket holds."""
+    limiter = RateLimiter(rate=1e-6, capacity=100, clock=FakeClock())
+
+    def acquire_many():
+        return sum(limiter.try_acquire() for _ in range(50))
+
+    assert sum(run_concurrently(acquire_many)) == 100
+    assert limiter.rejected == 300
+
+def http_error(status_code):
+    """Build a mock response whose raise_for_status raises for status_code."""
+    response = Mock()
+    response.status_code = status_code
+    response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    return response
+
+@pytest.mark.parametrize("status_code,opens", [(404, False), (401, False), (503, True)])
+def test_circuit_counts_only_outages(mocker, status_code, opens):
+    """Test that client errors do not open the circuit but server errors do."""
+    breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+    service = WeatherService(MOCK_API_KEY, MOCK_BASE_URL, circuit_breaker=breaker)
+    mocker.patch('requests.get', return_value=http_error(status_code))
+
+    for _ in range(3):
+        assert service.get_current_temperature(MOCK_CITY) is None
+    assert (breaker.state == CircuitState.OPEN) == opens
+
+def test_circuit_probe_released_by_client_error(mocker):
+    """Test that a 4xx probe closes the circuit instead of leaving it stuck."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock)
+    service = WeatherService(MOCK_API_KEY, MOCK_BASE_URL, circuit_breaker=breaker)
+    breaker.record_failure()
+    clock.now = 5
+    mocker.patch('requests.get', return_value=http_error(404))
+
+    assert service.get_current_temperature(MOCK_CITY) is None
+    assert breaker.state == CircuitState.CLOSED
@@ -1,60 +1,260 @@
 """
 Weather service client to demonstrate mocking.
 """
+import json
+import threading
+import time
 import requests
-from typing import Dict, Optional
+from enum import Enum, auto
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class RateLimitExceeded(requests.RequestException):
+    """Raised when a call is rejected by the client-side rate limiter."""
+
+
+class CircuitState(Enum):
+    """Possible states for a circuit breaker."""
+    CLOSED = auto()
+    OPEN = auto()
+    HALF_OPEN = auto()
+
+
+class CircuitBreaker:
+    """Stops calling a failing service until it has had time to recover.
+
+    Safe to share between threads; state changes happen under a lock.
+    """
+
+    _METRIC_NAMES = {
+        CircuitState.CLOSED: "closed",
+        CircuitState.OPEN: "opened",
+        CircuitState.HALF_OPEN: "half_opened",
+    }
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the breaker in the closed state."""
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {
+            "opened": 0,
+            "half_opened": 0,
+            "closed": 0,
+            "rejected": 0,
+        }
+
+    def _transition(self, state: CircuitState) -> None:
+        """Move to a new state and record the transition."""
+        if state == self.state:
+            return
+        self.state = state
+        self.metrics[self._METRIC_NAMES[state]] += 1
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go through to the service."""
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                if self.clock() - self.opened_at >= self.recovery_timeout:
+                    self._transition(CircuitState.HALF_OPEN)
+                else:
+                    self.metrics["rejected"] += 1
+                    return False
+
+            if self.state == CircuitState.HALF_OPEN:
+                # Only a single probe call is let through while half-open
+                if self._probe_in_flight:
+                    self.metrics["rejected"] += 1
+                    return False
+                self._probe_in_flight = True
+
+            return True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        with self._lock:
+            self._probe_in_flight = False
+            self.failures = 0
+            self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit if needed."""
+        with self._lock:
+            self._probe_in_flight = False
+            self.failures += 1
+            if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+                self._transition(CircuitState.OPEN)
+
+    def record_ignored(self) -> None:
+        """Record a call whose outcome says nothing about the service's health."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class RateLimiter:
+    """Token bucket limiting how many calls are made per second.
+
+    Safe to share between threads; each acquire refills and takes a token
+    under a lock.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize with a refill rate (tokens/second) and bucket size."""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        # The bucket must hold a whole token, even for rates below 1/s
+        capacity = capacity if capacity is not None else max(1.0, rate)
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.rejected += 1
+            return False
+
 
 class WeatherService:
     """A client for getting weather information."""
-    
-    def __init__(self, api_key: str, base_url: str = "https://api.weather.com"):
+
+    def __init__(self, api_key: str, base_url: str = "https://api.weather.com",
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
         """Initialize the weather service client."""
         self.api_key = api_key
         self.base_url = base_url
-    
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+
+    def _send(self, method: Callable, path: str, **kwargs) -> requests.Response:
+        """Send a request through the circuit breaker and rate limiter."""
+        if self.rate_limiter and not self.rate_limiter.try_acquire():
+            raise RateLimitExceeded(f"Rate limit exceeded for {self.base_url}")
+        if self.circuit_breaker and not self.circuit_breaker.allow_request():
+            raise CircuitOpenError(f"Circuit open for {self.base_url}")
+
+        try:
+            response = method(f"{self.base_url}{path}", timeout=5, **kwargs)
+            response.raise_for_status()
+        except requests.RequestException as error:
+            if self.circuit_breaker:
+                self._record_error(error)
+            raise
+
+        if self.circuit_breaker:
+            self.circuit_breaker.record_success()
+        return response
+
+    def _record_error(self, error: requests.RequestException) -> None:
+        """Tell the breaker about a failed call, counting only service outages.
+
+        Connection errors, timeouts and 5xx responses count as failures. A
+        4xx response (an unknown city, a bad key) shows the service is up,
+        and other errors such as an invalid URL say nothing either way.
+        """
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            self.circuit_breaker.record_failure()
+        elif isinstance(error, requests.HTTPError) and error.response is not None:
+            if error.response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+        else:
+            self.circuit_breaker.record_ignored()
+
     def get_current_temperature(self, city: str) -> Optional[float]:
         """Get the current temperature for a city."""
         try:
-            response = requests.get(
-                f"{self.base_url}/current",
-                params={"city": city, "api_key": self.api_key},
-                timeout=5
+            response = self._send(
+                requests.get,
+                "/current",
+                params={"city": city, "api_key": self.api_key}
             )
-            response.raise_for_status()
             data = response.json()
             return data["temperature"]
         except (requests.RequestException, KeyError):
             return None
-    
-    def get_forecast(self, city: str, days: int = 5) -> Optional[Dict]:
-        """Get the weather forecast for a city."""
+
+    def get_forecast(self, city: str, days: int = 5,
+                     fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Get the weather forecast for a city.
+
+        When fields are given (dotted paths such as "daily.max"), only
+        those values are returned instead of the full payload. Paths that
+        pass through a list collect the value from every element into a
+        tuple. A path that is missing, or runs into a scalar or null, makes
+        the result None. The whole body is still decoded; only what is
+        kept afterwards shrinks.
+        """
         try:
-            response = requests.get(
-                f"{self.base_url}/forecast",
+            response = self._send(
+                requests.get,
+                "/forecast",
                 params={
                     "city": city,
                     "days": days,
                     "api_key": self.api_key
-                },
-                timeout=5
+                }
             )
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException:
+            if fields is None:
+                return response.json()
+
+            # Decode the raw bytes directly, skipping requests' charset guessing
+            data = json.loads(response.content)
+            return {field: self._extract_field(data, field.split(".")) for field in fields}
+        except (requests.RequestException, KeyError, ValueError):
             return None
-    
+
+    @staticmethod
+    def _extract_field(data: Any, keys: Sequence[str]) -> Any:
+        """Follow a list of keys into decoded JSON, fanning out over lists."""
+        if not keys:
+            return data
+        if isinstance(data, list):
+            return tuple(WeatherService._extract_field(item, keys) for item in data)
+        if not isinstance(data, dict):
+            raise KeyError(keys[0])
+        return WeatherService._extract_field(data[keys[0]], keys[1:])
+
     def update_api_key(self, new_key: str) -> bool:
         """Update the API key."""
         try:
-            response = requests.post(
-                f"{self.base_url}/validate",
-                json={"api_key": new_key},
-                timeout=5
+            response = self._send(
+                requests.post,
+                "/validate",
+                json={"api_key": new_key}
             )
-            response.raise_for_status()
             if response.json()["valid"]:
                 self.api_key = new_key
                 return True
             return False
         except requests.RequestException:
-            return False
\ No newline at end of file
+            return False
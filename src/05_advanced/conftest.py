@@ -2,6 +2,7 @@
 Configuration and shared fixtures for advanced pytest features.
 """
 import pytest
+import data_processor
 from data_processor import ProcessingMode
 
 def pytest_configure(config):
@@ -20,6 +21,15 @@ def processor_mode(request):
     """Parameterized fixture providing processing modes."""
     return request.param
 
+@pytest.fixture(params=["numpy", "python"])
+def vector_engine(request, monkeypatch):
+    """Run vectorized processing with NumPy and with the pure-Python fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(data_processor, "np", None)
+    return request.param
+
 @pytest.fixture
 def sample_datasets():
     """Provide sample datasets for testing."""
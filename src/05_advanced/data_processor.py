@@ -1,58 +1,680 @@
 """
 Data processor class to demonstrate advanced pytest features.
 """
-from typing import List, Any, Optional
+import csv
+import io
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import List, Any, Iterable, Iterator, Optional, Sequence, Tuple, Union
 from enum import Enum, auto
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 class ProcessingMode(Enum):
     """Processing modes for data transformation."""
     STRICT = auto()
     LENIENT = auto()
 
+def _parse_token(token: str) -> Optional[float]:
+    """Parse a string token, returning None when it is not a valid number."""
+    try:
+        if '%' not in token:
+            # float() already ignores surrounding whitespace
+            return float(token)
+        # Remove whitespace and handle percentage
+        value = float(token.strip().rstrip('%'))
+    except ValueError:
+        return None
+    return value / 100 if token.endswith('%') else value
+
 class DataProcessor:
     """A class for processing and validating data."""
     
-    def __init__(self, mode: ProcessingMode = ProcessingMode.STRICT):
-        """Initialize the data processor."""
+    def __init__(self, mode: ProcessingMode = ProcessingMode.STRICT, cache_size: int = 0):
+        """
+        Initialize the data processor.
+        
+        A positive cache_size memoizes parsed string tokens in a bounded
+        LRU cache, which pays off when feeds repeat the same tokens.
+        """
         self.mode = mode
+        self.cache_size = cache_size
+        self._parse_token = lru_cache(maxsize=cache_size)(_parse_token) if cache_size else _parse_token
     
+    def cache_info(self):
+        """Return hit/miss statistics for the token cache, or None if caching is off."""
+        return self._parse_token.cache_info() if self.cache_size else None
+    
+    def _parse_number(self, num: Any) -> float:
+        """Convert a single value to float, raising ValueError/TypeError if invalid."""
+        if isinstance(num, str):
+            value = self._parse_token(num)
+            if value is None:
+                raise ValueError(f"Invalid number: {num}")
+            return value
+        return float(num)
+
     def process_numbers(self, numbers: List[Any]) -> List[float]:
         """Process a list of numbers, converting strings to floats."""
         result = []
         
         for num in numbers:
             try:
-                if isinstance(num, str):
-                    # Remove whitespace and handle percentage
-                    cleaned = num.strip().rstrip('%')
-                    value = float(cleaned)
-                    if num.endswith('%'):
-                        value /= 100
-                else:
-                    value = float(num)
-                result.append(value)
+                result.append(self._parse_number(num))
             except (ValueError, TypeError):
                 if self.mode == ProcessingMode.STRICT:
                     raise ValueError(f"Invalid number: {num}")
                 # In lenient mode, skip invalid values
         
         return result
+
+    def iter_numbers(self, numbers: Iterable[Any]) -> Iterator[float]:
+        """
+        Yield converted values lazily from any iterable.
+        
+        Strict mode raises ValueError at the first invalid value; lenient
+        mode skips it. Nothing is buffered, so this can sit between a
+        reader and a downstream consumer.
+        """
+        parse = self._parse_number
+        strict = self.mode == ProcessingMode.STRICT
+        for num in numbers:
+            try:
+                yield parse(num)
+            except (ValueError, TypeError):
+                if strict:
+                    raise ValueError(f"Invalid number: {num}")
+    
+    def process_numbers_array(self, numbers: Iterable[Any]) -> array:
+        """
+        Process numbers into a compact array('d').
+        
+        Stores 8 bytes per value instead of a list of float objects. Also
+        serves as the pure-Python engine for process_numbers_vectorized.
+        """
+        return array('d', self.iter_numbers(numbers))
+
+    def read_csv_column(self, path: Path, column: Union[int, str], delimiter: str = ',',
+                        header: bool = True, chunk_size: int = 1 << 20) -> Iterator[Any]:
+        """
+        Stream one numeric column of a CSV file as blocks of floats.
+        
+        The file is read about chunk_size characters at a time, and each
+        block of rows is parsed into an ndarray by NumPy's C reader, so no
+        str is created per cell. Without NumPy, or for a block the C reader
+        rejects (percentages, missing cells, anything float() would refuse),
+        the csv module splits the rows and the cells are converted with the
+        same rules as process_numbers into an array('d'). Feed the blocks to
+        calculate_column_statistics. A column given by name is looked up in
+        the header row. Missing cells count as invalid.
+        """
+        with open(path, newline='', buffering=1024 * 1024) as file:
+            names = next(csv.reader([file.readline()], delimiter=delimiter), []) if header else []
+            if isinstance(column, str):
+                if column not in names:
+                    raise ValueError(f"Column not found: {column}")
+                column = names.index(column)
+            
+            while True:
+                text = file.read(chunk_size)
+                if not text:
+                    return
+                # Finish the last row, including one whose quoted field spans lines
+                text += file.readline()
+                while text.count('"') % 2:
+                    line = file.readline()
+                    if not line:
+                        break
+                    text += line
+                block = self._parse_csv_block(text, column, delimiter)
+                if len(block):
+                    yield block
+    
+    def _parse_csv_block(self, text: str, column: int, delimiter: str):
+        """Parse one column out of whole CSV rows, in C when NumPy accepts them all."""
+        if np is not None and text.strip():
+            try:
+                return np.loadtxt(io.StringIO(text), dtype=np.float64, delimiter=delimiter,
+                                  usecols=column, comments=None, quotechar='"', ndmin=1)
+            except ValueError:
+                pass
+        rows = [row for row in csv.reader(io.StringIO(text), delimiter=delimiter) if row]
+        try:
+            # Plain numbers convert without per-cell Python bytecode
+            return array('d', map(float, [row[column] for row in rows]))
+        except (ValueError, IndexError):
+            cells = (row[column] if column < len(row) else None for row in rows)
+            return self.process_numbers_array(cells)
+    
+    @staticmethod
+    def read_binary_column(path: Path, typecode: str = 'd',
+                           chunk_size: int = 1 << 20) -> Iterator[Any]:
+        """
+        Stream a raw binary file of packed numbers (array typecode) in blocks.
+        
+        With NumPy the file is memory-mapped and each block is an ndarray
+        view of about chunk_size bytes, so values are never copied.
+        Without it, blocks are array(typecode) filled straight from the
+        file. Feed the blocks to calculate_column_statistics.
+        """
+        itemsize = array(typecode).itemsize
+        size = os.path.getsize(path)
+        if size % itemsize:
+            raise ValueError(f"File size {size} is not a multiple of {itemsize} bytes")
+        if not size:
+            return
+        step = max(1, chunk_size // itemsize)
+        
+        if np is not None:
+            values = np.memmap(path, dtype=typecode, mode='r')
+            for start in range(0, len(values), step):
+                yield values[start:start + step]
+            return
+        
+        with open(path, 'rb') as file:
+            for start in range(0, size // itemsize, step):
+                block = array(typecode)
+                block.fromfile(file, min(step, size // itemsize - start))
+                yield block
     
-    def calculate_statistics(self, numbers: List[Any]) -> Optional[dict]:
-        """Calculate basic statistics for a list of numbers."""
+    def process_numbers_vectorized(self, numbers: Sequence[Any]):
+        """
+        Process numbers in bulk into a float array.
+
+        Uses NumPy when it is installed and returns an ndarray; otherwise
+        falls back to a pure-Python loop returning array('d'). Invalid
+        values raise ValueError in strict mode and are dropped in lenient
+        mode, matching process_numbers.
+        """
+        if np is None:
+            return self.process_numbers_array(numbers)
+
+        if isinstance(numbers, np.ndarray) and numbers.dtype.kind in "biuf":
+            return numbers.astype(np.float64).ravel()
+
+        items = numbers if isinstance(numbers, list) else list(numbers)
+        # Fast path: plain numbers and numeric strings convert without
+        # any per-item Python bytecode
         try:
-            processed = self.process_numbers(numbers)
-            if not processed:
+            return np.fromiter(map(float, items), dtype=np.float64, count=len(items))
+        except (ValueError, TypeError):
+            pass
+
+        values, valid = self._convert_masked(items)
+        if valid.all():
+            return values
+        if self.mode == ProcessingMode.STRICT:
+            first_invalid = int(np.argmin(valid))
+            raise ValueError(f"Invalid number: {items[first_invalid]}")
+        return values[valid]
+
+    def _convert_masked(self, items: List[Any]) -> Tuple[Any, Any]:
+        """Convert mixed input with NumPy, returning values and a validity mask."""
+        count = len(items)
+        is_str = np.fromiter(map(isinstance, items, repeat(str)), dtype=bool, count=count)
+        objects = np.empty(count, dtype=object)
+        objects[:] = items
+
+        values = np.empty(count)
+        valid = np.empty(count, dtype=bool)
+
+        if is_str.any():
+            strings = objects[is_str].astype(str)
+            percent = np.char.endswith(strings, '%')
+            cleaned = np.char.rstrip(np.char.strip(strings), '%')
+            converted, ok = self._convert_chunked(cleaned.tolist())
+            converted[percent] /= 100
+            values[is_str] = converted
+            valid[is_str] = ok
+
+        if not is_str.all():
+            converted, ok = self._convert_chunked(objects[~is_str].tolist())
+            values[~is_str] = converted
+            valid[~is_str] = ok
+
+        return values, valid
+
+    @staticmethod
+    def _convert_chunked(items: List[Any], chunk_size: int = 65536) -> Tuple[Any, Any]:
+        """Convert items to floats chunk by chunk, parsing per item only in failing chunks."""
+        values = np.empty(len(items))
+        ok = np.ones(len(items), dtype=bool)
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            try:
+                values[start:start + len(chunk)] = np.fromiter(
+                    map(float, chunk), dtype=np.float64, count=len(chunk)
+                )
+                continue
+            except (ValueError, TypeError):
+                pass
+            for offset, item in enumerate(chunk, start):
+                try:
+                    values[offset] = float(item)
+                except (ValueError, TypeError):
+                    values[offset] = np.nan
+                    ok[offset] = False
+        return values, ok
+
+    @staticmethod
+    def _percentile(ordered: Sequence[float], percent: float) -> float:
+        """Linearly interpolated percentile of already sorted values."""
+        position = (len(ordered) - 1) * percent / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+    
+    def _summary(self, count: int, total: float, minimum: float, maximum: float, m2: float,
+                 ordered: Optional[Sequence[float]],
+                 percentiles: Optional[Sequence[float]]) -> dict:
+        """Build the statistics dict from moments and, if kept, the sorted values."""
+        variance = m2 / count
+        stats = {
+            "count": count,
+            "sum": total,
+            "average": total / count,
+            "min": minimum,
+            "max": maximum,
+            "variance": variance,
+            "stddev": math.sqrt(variance)
+        }
+        if ordered is not None:
+            stats["median"] = float(self._percentile(ordered, 50))
+            stats["percentiles"] = {p: float(self._percentile(ordered, p)) for p in percentiles}
+        return stats
+    
+    def calculate_statistics(self, numbers: Iterable[Any],
+                             percentiles: Optional[Sequence[float]] = None) -> Optional[dict]:
+        """
+        Calculate statistics for numbers in a single pass.
+        
+        Count, sum, average, min, max and population variance/stddev
+        (Welford's method) use constant memory, so any iterable can be
+        passed. Requesting percentiles (0-100, pass an empty list for just
+        the median) keeps a compact copy of the values to sort.
+        """
+        if percentiles is not None and any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        
+        try:
+            count = 0
+            total = 0.0
+            mean = 0.0
+            m2 = 0.0
+            minimum = maximum = None
+            kept = array('d') if percentiles is not None else None
+            
+            for value in self.iter_numbers(numbers):
+                count += 1
+                total += value
+                delta = value - mean
+                mean += delta / count
+                m2 += delta * (value - mean)
+                if minimum is None or value < minimum:
+                    minimum = value
+                if maximum is None or value > maximum:
+                    maximum = value
+                if kept is not None:
+                    kept.append(value)
+            
+            if not count:
                 return None
+            ordered = sorted(kept) if kept is not None else None
+            return self._summary(count, total, minimum, maximum, m2, ordered, percentiles)
+        except ValueError:
+            if self.mode == ProcessingMode.STRICT:
+                raise
+            return None
+    
+    def calculate_column_statistics(self, blocks: Iterable[Sequence[float]],
+                                    percentiles: Optional[Sequence[float]] = None
+                                    ) -> Optional[dict]:
+        """
+        Calculate statistics over blocks of already parsed numbers.
+        
+        Takes the blocks yielded by read_csv_column and read_binary_column
+        (or any ndarrays or arrays) and returns the same dict as
+        calculate_statistics. With NumPy each block is reduced in C and the
+        per-block moments are combined, so memory stays at one block unless
+        percentiles are requested.
+        """
+        if percentiles is not None and any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        
+        count = 0
+        total = mean = m2 = 0.0
+        minimum = maximum = None
+        kept = [] if percentiles is not None else None
+        for block in blocks:
+            size = len(block)
+            if not size:
+                continue
+            if np is not None:
+                values = np.asarray(block, dtype=np.float64)
+                block_total = float(values.sum())
+                deviations = values - block_total / size
+                block_m2 = float(deviations @ deviations)
+                block_min, block_max = float(values.min()), float(values.max())
+            else:
+                values = block
+                block_total = float(sum(values))
+                block_mean = block_total / size
+                block_m2 = sum((value - block_mean) ** 2 for value in values)
+                block_min, block_max = float(min(values)), float(max(values))
+            if kept is not None:
+                kept.append(values)
+            # Chan et al.'s pairwise update, as in StatsAccumulator.merge
+            merged = count + size
+            delta = block_total / size - mean
+            mean += delta * size / merged
+            m2 += block_m2 + delta * delta * count * size / merged
+            total += block_total
+            count = merged
+            minimum = block_min if minimum is None else min(minimum, block_min)
+            maximum = block_max if maximum is None else max(maximum, block_max)
+        
+        if not count:
+            return None
+        ordered = None
+        if kept is not None:
+            if np is not None:
+                ordered = np.sort(np.concatenate(kept))
+            else:
+                ordered = sorted(value for values in kept for value in values)
+        return self._summary(count, total, minimum, maximum, m2, ordered, percentiles)
+    
+    @staticmethod
+    def _split(numbers: Sequence[Any], workers: int,
+               chunk_size: Optional[int]) -> List[Tuple[int, Sequence[Any]]]:
+        """Split input into (offset, chunk) pairs for worker processes."""
+        if chunk_size is None:
+            chunk_size = max(1, math.ceil(len(numbers) / (workers * 4)))
+        return [(start, numbers[start:start + chunk_size])
+                for start in range(0, len(numbers), chunk_size)]
+    
+    def process_numbers_parallel(self, numbers: Sequence[Any], workers: Optional[int] = None,
+                                 chunk_size: Optional[int] = None) -> List[float]:
+        """
+        Process numbers across worker processes.
+        
+        Chunks are parsed in a process pool and each worker writes its
+        floats straight into a shared memory buffer, so results are not
+        pickled back to the parent. Output order and strict/lenient
+        behaviour match process_numbers.
+        """
+        if not len(numbers):
+            return []
+        workers = workers or os.cpu_count() or 1
+        chunks = self._split(numbers, workers, chunk_size)
+        
+        shm = shared_memory.SharedMemory(create=True, size=len(numbers) * 8)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_process_chunk_into, self.mode, chunk, shm.name, offset)
+                    for offset, chunk in chunks
+                ]
+                # Results are collected in order so strict mode reports the first invalid value
+                kept = [future.result() for future in futures]
             
-            return {
-                "count": len(processed),
-                "sum": sum(processed),
-                "average": sum(processed) / len(processed),
-                "min": min(processed),
-                "max": max(processed)
-            }
+            result = []
+            with shm.buf.cast('d') as values:
+                for (offset, _), count in zip(chunks, kept):
+                    result.extend(values[offset:offset + count].tolist())
+            return result
+        finally:
+            shm.close()
+            shm.unlink()
+    
+    def calculate_statistics_parallel(self, numbers: Sequence[Any], workers: Optional[int] = None,
+                                      chunk_size: Optional[int] = None,
+                                      percentiles: Optional[Sequence[float]] = None) -> Optional[dict]:
+        """
+        Calculate statistics across worker processes.
+        
+        Each worker builds a StatsAccumulator for its chunk and the partial
+        results are merged. The result has the same keys as
+        calculate_statistics; median and percentiles are approximate.
+        """
+        if percentiles is not None and any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        if not len(numbers):
+            return None
+        workers = workers or os.cpu_count() or 1
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_accumulate_chunk, self.mode, chunk, percentiles)
+                    for _, chunk in self._split(numbers, workers, chunk_size)
+                ]
+                accumulator = StatsAccumulator(self.mode, percentiles)
+                for future in futures:
+                    accumulator.merge(future.result())
+            return accumulator.result()
         except ValueError:
             if self.mode == ProcessingMode.STRICT:
                 raise
-            return None
\ No newline at end of file
+            return None
+
+class _TDigest:
+    """
+    Merging t-digest sketch for approximate quantiles.
+    
+    Values are buffered and periodically compressed into at most about
+    `compression` centroids, so memory does not grow with the number of
+    values. Centroids near the tails stay small, which keeps
+    extreme percentiles accurate.
+    """
+    
+    def __init__(self, compression: int = 100):
+        """Initialize an empty digest."""
+        self.compression = compression
+        self.centroids: List[Tuple[float, float]] = []
+        self._buffer: List[float] = []
+        self._buffer_limit = 10 * compression
+    
+    def add_many(self, values: Iterable[float]) -> None:
+        """Add unit-weight values to the digest."""
+        self._buffer.extend(values)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+    
+    def merge(self, other: "_TDigest") -> None:
+        """Fold another digest's centroids into this one."""
+        other._compress()
+        self._compress()
+        self.centroids = sorted(self.centroids + other.centroids)
+        self._compress()
+    
+    def _q_limit(self, q: float) -> float:
+        """Largest quantile a centroid starting at q may reach (arcsine scale function)."""
+        scale = self.compression / (2 * math.pi)
+        k = scale * math.asin(2 * q - 1) + 1
+        return (math.sin(min(k / scale, math.pi / 2)) + 1) / 2
+    
+    def _compress(self) -> None:
+        """Merge buffered values and centroids into a bounded set of centroids."""
+        items = self.centroids
+        if self._buffer:
+            items = sorted(items + [(value, 1.0) for value in self._buffer])
+            self._buffer = []
+        if not items:
+            return
+        
+        total = sum(weight for _, weight in items)
+        merged = []
+        cur_mean, cur_weight = items[0]
+        weight_before = 0.0
+        q_limit = self._q_limit(0.0)
+        for mean, weight in items[1:]:
+            if (weight_before + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                merged.append((cur_mean, cur_weight))
+                weight_before += cur_weight
+                q_limit = self._q_limit(weight_before / total)
+                cur_mean, cur_weight = mean, weight
+        merged.append((cur_mean, cur_weight))
+        self.centroids = merged
+    
+    def quantile(self, q: float, minimum: float, maximum: float) -> float:
+        """Estimate the q-th quantile (0-1), interpolating between centroid centres."""
+        self._compress()
+        centroids = self.centroids
+        total = sum(weight for _, weight in centroids)
+        target = q * total
+        
+        # Points are (cumulative weight, value), bounded by the exact extremes
+        previous_position, previous_value = 0.0, minimum
+        position = 0.0
+        for mean, weight in centroids:
+            centre = position + weight / 2
+            if target <= centre:
+                span = centre - previous_position
+                fraction = (target - previous_position) / span if span else 0.0
+                return previous_value + (mean - previous_value) * fraction
+            previous_position, previous_value = centre, mean
+            position += weight
+        
+        span = total - previous_position
+        fraction = (target - previous_position) / span if span else 1.0
+        return previous_value + (maximum - previous_value) * fraction
+
+class StatsAccumulator:
+    """
+    Incremental statistics over a stream of numbers.
+    
+    Values are parsed with the same rules as DataProcessor. Memory stays
+    constant however many chunks are fed in: moments use Welford's method
+    and quantiles come from a t-digest sketch, so median and percentiles
+    are approximate. As with calculate_statistics, the sketch is only kept
+    when percentiles are passed (an empty list for just the median).
+    Accumulators built independently can be merged.
+    """
+    
+    def __init__(self, mode: ProcessingMode = ProcessingMode.STRICT,
+                 percentiles: Optional[Sequence[float]] = None, compression: int = 200):
+        """Initialize an empty accumulator."""
+        if percentiles is not None and any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError("Percentiles must be between 0 and 100")
+        self.mode = mode
+        self.percentiles = None if percentiles is None else tuple(percentiles)
+        self._processor = DataProcessor(mode)
+        self._digest = None if percentiles is None else _TDigest(compression)
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+    
+    def update(self, chunk: Iterable[Any]) -> "StatsAccumulator":
+        """Add a chunk of values. Raises ValueError on invalid values in strict mode."""
+        count, total, mean, m2 = self.count, self.total, self.mean, self.m2
+        minimum, maximum = self.minimum, self.maximum
+        digest = self._digest
+        pending: List[float] = []
+        try:
+            for value in self._processor.iter_numbers(chunk):
+                count += 1
+                total += value
+                delta = value - mean
+                mean += delta / count
+                m2 += delta * (value - mean)
+                if minimum is None or value < minimum:
+                    minimum = value
+                if maximum is None or value > maximum:
+                    maximum = value
+                if digest is not None:
+                    pending.append(value)
+                    if len(pending) >= 4096:
+                        digest.add_many(pending)
+                        pending.clear()
+        finally:
+            # Values before an invalid one still count
+            if digest is not None:
+                digest.add_many(pending)
+            self.count, self.total, self.mean, self.m2 = count, total, mean, m2
+            self.minimum, self.maximum = minimum, maximum
+        return self
+    
+    def merge(self, other: "StatsAccumulator") -> "StatsAccumulator":
+        """
+        Combine another accumulator's partial statistics into this one.
+        
+        Both must have been built with the same percentiles, so that either
+        both or neither keep a quantile sketch. Raises ValueError otherwise.
+        """
+        if self.percentiles != other.percentiles:
+            raise ValueError(
+                f"Cannot merge accumulators with percentiles {self.percentiles} "
+                f"and {other.percentiles}"
+            )
+        if not other.count:
+            return self
+        if not self.count:
+            self.mean, self.m2 = other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+        else:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.minimum = min(self.minimum, other.minimum)
+            self.maximum = max(self.maximum, other.maximum)
+        self.count += other.count
+        self.total += other.total
+        if self._digest is not None:
+            self._digest.merge(other._digest)
+        return self
+    
+    def result(self) -> Optional[dict]:
+        """Return statistics in the same shape as DataProcessor.calculate_statistics."""
+        if not self.count:
+            return None
+        
+        variance = self.m2 / self.count
+        stats = {
+            "count": self.count,
+            "sum": self.total,
+            "average": self.total / self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+            "variance": variance,
+            "stddev": math.sqrt(variance),
+        }
+        if self._digest is not None:
+            quantile = self._digest.quantile
+            stats["median"] = quantile(0.5, self.minimum, self.maximum)
+            stats["percentiles"] = {
+                p: quantile(p / 100, self.minimum, self.maximum) for p in self.percentiles
+            }
+        return stats
+
+def _process_chunk_into(mode: ProcessingMode, chunk: Sequence[Any],
+                        shm_name: str, offset: int) -> int:
+    """Worker: parse a chunk into shared memory at offset, returning the number kept."""
+    values = DataProcessor(mode).process_numbers(chunk)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        with shm.buf.cast('d') as out:
+            out[offset:offset + len(values)] = array('d', values)
+    finally:
+        shm.close()
+    return len(values)
+
+def _accumulate_chunk(mode: ProcessingMode, chunk: Sequence[Any],
+                      percentiles: Optional[Sequence[float]]) -> StatsAccumulator:
+    """Worker: build partial statistics for a chunk."""
+    return StatsAccumulator(mode, percentiles).update(chunk)
@@ -2,7 +2,10 @@
 Tests demonstrating advanced pytest features.
 """
 import pytest
-from data_processor import DataProcessor, ProcessingMode
+import itertools
+import random
+from array import array
+from data_processor import DataProcessor, ProcessingMode, StatsAccumulator
 
 # Test data for parameterization
 VALID_INPUTS = [
@@ -43,6 +46,91 @@ class TestDataProcessor:
         # Should only include valid numbers
         assert all(isinstance(x, float) for x in result)
     
+    @pytest.mark.parametrize("input_data,expected", VALID_INPUTS + [
+        ([" 3 ", 4.5, "50%", True], [3.0, 4.5, 0.5, 1.0]),
+        (["nan"], [float("nan")]),
+    ])
+    def test_process_numbers_vectorized(self, vector_engine, input_data, expected):
+        """Test that both vectorized engines match process_numbers."""
+        processor = DataProcessor()
+        result = processor.process_numbers_vectorized(input_data)
+        assert list(result) == pytest.approx(expected, nan_ok=True)
+    
+    @pytest.mark.parametrize("input_data,first_invalid", [
+        (["invalid", 1, 2], "invalid"),
+        (["10", "bad%", "30"], "bad%"),
+        ([1, None, 3], "None"),
+    ])
+    def test_process_numbers_vectorized_strict(self, vector_engine, input_data, first_invalid):
+        """Test that strict mode reports the first invalid value."""
+        processor = DataProcessor(ProcessingMode.STRICT)
+        with pytest.raises(ValueError, match=f"Invalid number: {first_invalid}"):
+            processor.process_numbers_vectorized(input_data)
+    
+    def test_process_numbers_vectorized_lenient(self, vector_engine):
+        """Test that lenient mode masks out invalid values."""
+        processor = DataProcessor(ProcessingMode.LENIENT)
+        result = processor.process_numbers_vectorized(["1", None, "20%", "x", 4, [5]])
+        assert list(result) == pytest.approx([1.0, 0.2, 4.0])
+    
+    def test_iter_numbers_is_lazy(self):
+        """Test that iter_numbers pulls input only as values are consumed."""
+        processor = DataProcessor()
+        source = (str(n) for n in itertools.count())
+        values = processor.iter_numbers(source)
+        
+        assert list(itertools.islice(values, 3)) == [0.0, 1.0, 2.0]
+        assert next(source) == "3"
+    
+    def test_iter_numbers_modes(self):
+        """Test that strict mode fails only when the invalid value is reached."""
+        strict = DataProcessor(ProcessingMode.STRICT).iter_numbers(["1", "x", "2"])
+        assert next(strict) == 1.0
+        with pytest.raises(ValueError, match="Invalid number: x"):
+            next(strict)
+        
+        lenient = DataProcessor(ProcessingMode.LENIENT).iter_numbers(["1", "x", "2"])
+        assert list(lenient) == [1.0, 2.0]
+    
+    @pytest.mark.parametrize("input_data,expected", VALID_INPUTS)
+    def test_process_numbers_array(self, input_data, expected):
+        """Test the compact array('d') variant."""
+        result = DataProcessor().process_numbers_array(iter(input_data))
+        assert result == array('d', expected)
+    
+    @pytest.mark.parametrize("cache_size", [0, 16])
+    @pytest.mark.parametrize("token,expected", [
+        ("0.5", 0.5),
+        (" 3 ", 3.0),
+        ("10%", 0.1),
+        (" 10%", 0.1),
+        ("10% ", 10.0),
+        ("5%%", 0.05),
+        ("-2.5e1", -25.0),
+    ])
+    def test_token_parsing(self, cache_size, token, expected):
+        """Test string token rules with and without the token cache."""
+        processor = DataProcessor(cache_size=cache_size)
+        assert processor.process_numbers([token, token]) == [expected, expected]
+    
+    def test_token_cache_info(self):
+        """Test that the token cache reports hits and misses."""
+        processor = DataProcessor(ProcessingMode.LENIENT, cache_size=2)
+        processor.process_numbers(["1", "1", "2%", "bad", "bad", "1", 3])
+        
+        info = processor.cache_info()
+        assert info.misses == 4
+        assert info.hits == 2
+        assert info.currsize == 2
+        assert DataProcessor().cache_info() is None
+    
+    def test_token_cache_strict(self):
+        """Test that cached invalid tokens still raise in strict mode."""
+        processor = DataProcessor(ProcessingMode.STRICT, cache_size=8)
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Invalid number: bad"):
+                processor.process_numbers(["1", "bad"])
+    
     @pytest.mark.slow
     def test_calculate_statistics_all_modes(self, processor_mode, sample_datasets):
         """
@@ -78,5 +166,263 @@ class TestDataProcessor:
         else:
             assert stats["count"] == expected_count
 
+    def test_statistics_values(self):
+        """Test the single-pass statistics against known values."""
+        processor = DataProcessor()
+        stats = processor.calculate_statistics([2, "4", 4, 4, 5, 5, "7", "9"])
+        
+        assert stats["count"] == 8
+        assert stats["sum"] == 40
+        assert stats["average"] == 5
+        assert stats["min"] == 2
+        assert stats["max"] == 9
+        assert stats["variance"] == pytest.approx(4.0)
+        assert stats["stddev"] == pytest.approx(2.0)
+        assert "median" not in stats
+    
+    def test_statistics_from_iterator(self):
+        """Test that statistics accept a one-shot iterator."""
+        processor = DataProcessor()
+        stats = processor.calculate_statistics(str(n) for n in range(1, 101))
+        assert stats["count"] == 100
+        assert stats["average"] == 50.5
+    
+    @pytest.mark.parametrize("percentiles,expected", [
+        ([], {}),
+        ([0, 100], {0: 1.0, 100: 5.0}),
+        ([25, 90], {25: 2.0, 90: 4.6}),
+    ])
+    def test_statistics_percentiles(self, percentiles, expected):
+        """Test median and interpolated percentiles."""
+        processor = DataProcessor()
+        stats = processor.calculate_statistics([5, 1, 4, 2, 3], percentiles=percentiles)
+        assert stats["median"] == 3.0
+        assert stats["percentiles"] == pytest.approx(expected)
+    
+    @pytest.mark.parametrize("mode", [ProcessingMode.STRICT, ProcessingMode.LENIENT])
+    def test_statistics_invalid_percentile(self, mode):
+        """Test that out-of-range percentiles are rejected in every mode."""
+        processor = DataProcessor(mode)
+        with pytest.raises(ValueError, match="between 0 and 100"):
+            processor.calculate_statistics([1, 2, 3], percentiles=[101])
+
+@pytest.mark.data_processing
+class TestColumnReaders:
+    """Tests for reading numeric columns straight from files."""
+    
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """Create a small CSV file with a mixed-format numeric column."""
+        path = tmp_path / "prices.csv"
+        path.write_text('id,price,note\n1,10,"a, b"\n2, 20 ,x\n\n3,50%,y\n4,bad,z\n5\n')
+        return path
+    
+    @staticmethod
+    def flatten(blocks):
+        """Join the blocks a column reader yields into one list of floats."""
+        return [float(value) for block in blocks for value in block]
+    
+    @pytest.mark.parametrize("column", ["price", 1])
+    def test_read_csv_column(self, vector_engine, csv_file, column):
+        """Test streaming a column by name or index in lenient mode."""
+        processor = DataProcessor(ProcessingMode.LENIENT)
+        values = processor.read_csv_column(csv_file, column)
+        assert self.flatten(values) == [10.0, 20.0, 0.5]
+    
+    def test_read_csv_column_strict(self, vector_engine, csv_file):
+        """Test that strict mode stops at the first invalid cell."""
+        processor = DataProcessor(ProcessingMode.STRICT)
+        with pytest.raises(ValueError, match="Invalid number: bad"):
+            processor.calculate_column_statistics(processor.read_csv_column(csv_file, "price"))
+    
+    def test_read_csv_column_unknown(self, csv_file):
+        """Test that an unknown column name is reported."""
+        processor = DataProcessor()
+        with pytest.raises(ValueError, match="Column not found: cost"):
+            list(processor.read_csv_column(csv_file, "cost"))
+    
+    def test_read_csv_column_blocks(self, vector_engine, tmp_path):
+        """Test small blocks, including a quoted field that spans lines."""
+        path = tmp_path / "prices.csv"
+        rows = [f'{i},{i * 1.5},"note\n{i}"' for i in range(200)]
+        path.write_text("id,price,note\n" + "\n".join(rows) + "\n")
+        
+        processor = DataProcessor()
+        blocks = list(processor.read_csv_column(path, "price", chunk_size=256))
+        assert len(blocks) > 1
+        assert self.flatten(blocks) == [i * 1.5 for i in range(200)]
+    
+    @pytest.mark.parametrize("percentiles", [None, [10, 90]])
+    def test_column_statistics_match(self, vector_engine, tmp_path, percentiles):
+        """Test that block statistics match calculate_statistics."""
+        rng = random.Random(7)
+        data = [rng.uniform(-100, 100) for _ in range(5000)]
+        path = tmp_path / "values.csv"
+        path.write_text("value\n" + "".join(f"{value!r}\n" for value in data))
+        
+        processor = DataProcessor()
+        stats = processor.calculate_column_statistics(
+            processor.read_csv_column(path, 0, chunk_size=4096), percentiles=percentiles)
+        expected = processor.calculate_statistics(data, percentiles=percentiles)
+        assert stats.keys() == expected.keys()
+        for key, value in expected.items():
+            assert stats[key] == pytest.approx(value)
+        assert processor.calculate_column_statistics([]) is None
+    
+    def test_read_binary_column(self, vector_engine, tmp_path):
+        """Test statistics over a memory-mapped binary column."""
+        path = tmp_path / "values.bin"
+        with path.open("wb") as file:
+            array('d', range(1000)).tofile(file)
+        
+        processor = DataProcessor()
+        blocks = list(processor.read_binary_column(path, chunk_size=64))
+        assert len(blocks) == 125
+        stats = processor.calculate_column_statistics(blocks)
+        assert stats["count"] == 1000
+        assert stats["sum"] == sum(range(1000))
+    
+    def test_read_binary_column_is_mapped(self, tmp_path):
+        """Test that NumPy blocks are views of the mapped file, not copies."""
+        np = pytest.importorskip("numpy")
+        path = tmp_path / "values.bin"
+        path.write_bytes(array('d', range(100)).tobytes())
+        
+        (block,) = DataProcessor.read_binary_column(path)
+        assert isinstance(block, np.memmap)
+        assert block.tolist() == list(range(100))
+    
+    @pytest.mark.parametrize("content,typecode,expected", [
+        (b"", "d", []),
+        (array('i', [1, -2]).tobytes(), "i", [1.0, -2.0]),
+    ])
+    def test_read_binary_column_typecodes(self, vector_engine, tmp_path, content, typecode,
+                                          expected):
+        """Test empty files and integer typecodes."""
+        path = tmp_path / "values.bin"
+        path.write_bytes(content)
+        assert self.flatten(DataProcessor.read_binary_column(path, typecode)) == expected
+    
+    def test_read_binary_column_truncated(self, tmp_path):
+        """Test that a file with a partial value is rejected."""
+        path = tmp_path / "values.bin"
+        path.write_bytes(b"\x00" * 12)
+        with pytest.raises(ValueError, match="not a multiple of 8"):
+            list(DataProcessor.read_binary_column(path))
+
+@pytest.mark.slow
+@pytest.mark.data_processing
+class TestParallelProcessing:
+    """Tests for multi-process chunked processing."""
+    
+    DATA = [1, "2", "30%", 4.5, " 6 ", 7, "8", "9%", 10, "11"] * 50
+    
+    def test_process_numbers_parallel(self):
+        """Test that parallel output matches serial output, in order."""
+        processor = DataProcessor()
+        result = processor.process_numbers_parallel(self.DATA, workers=2, chunk_size=64)
+        assert result == processor.process_numbers(self.DATA)
+    
+    def test_process_numbers_parallel_lenient(self):
+        """Test that lenient mode drops invalid values across chunk boundaries."""
+        data = ["1", "bad", 3, None] * 25
+        processor = DataProcessor(ProcessingMode.LENIENT)
+        result = processor.process_numbers_parallel(data, workers=2, chunk_size=7)
+        assert result == [1.0, 3.0] * 25
+    
+    def test_process_numbers_parallel_strict(self):
+        """Test that strict mode reports the first invalid value."""
+        data = [1] * 100 + ["first"] + [2] * 100 + ["second"]
+        processor = DataProcessor(ProcessingMode.STRICT)
+        with pytest.raises(ValueError, match="Invalid number: first"):
+            processor.process_numbers_parallel(data, workers=2, chunk_size=50)
+    
+    def test_calculate_statistics_parallel(self):
+        """Test that merged partial statistics match a single pass."""
+        processor = DataProcessor()
+        stats = processor.calculate_statistics_parallel(self.DATA, workers=2, chunk_size=64)
+        expected = processor.calculate_statistics(self.DATA)
+        assert stats.keys() == expected.keys()
+        for key in ["count", "sum", "average", "min", "max", "variance"]:
+            assert stats[key] == pytest.approx(expected[key])
+        
+        stats = processor.calculate_statistics_parallel(self.DATA, workers=2, percentiles=[])
+        assert stats.keys() == processor.calculate_statistics(self.DATA, percentiles=[]).keys()
+        assert stats["percentiles"] == {}
+    
+    def test_empty_input(self):
+        """Test that empty input skips the process pool."""
+        processor = DataProcessor()
+        assert processor.process_numbers_parallel([]) == []
+        assert processor.calculate_statistics_parallel([]) is None
+
+@pytest.mark.data_processing
+class TestStatsAccumulator:
+    """Tests for incremental statistics."""
+    
+    def test_matches_calculate_statistics(self):
+        """Test that chunked updates give the same moments as a single pass."""
+        data = [1, "2", "30%", 4.5, " 6 ", 7, 8, "9"]
+        accumulator = StatsAccumulator()
+        for start in range(0, len(data), 3):
+            accumulator.update(data[start:start + 3])
+        
+        stats = accumulator.result()
+        expected = DataProcessor().calculate_statistics(data)
+        assert stats.keys() == expected.keys()
+        for key in ["count", "sum", "average", "min", "max", "variance", "stddev"]:
+            assert stats[key] == pytest.approx(expected[key])
+    
+    def test_merge_partial_results(self):
+        """Test that independently built accumulators merge correctly."""
+        rng = random.Random(42)
+        data = [rng.gauss(10, 3) for _ in range(20000)]
+        workers = [StatsAccumulator(percentiles=[5, 95]).update(data[i::4]) for i in range(4)]
+        
+        merged = StatsAccumulator(percentiles=[5, 95])
+        for worker in workers:
+            merged.merge(worker)
+        
+        stats = merged.result()
+        exact = DataProcessor().calculate_statistics(data, percentiles=[5, 95])
+        assert stats["count"] == 20000
+        assert stats["average"] == pytest.approx(exact["average"])
+        assert stats["variance"] == pytest.approx(exact["variance"])
+        assert stats["median"] == pytest.approx(exact["median"], abs=0.1)
+        assert stats["percentiles"][5] == pytest.approx(exact["percentiles"][5], abs=0.1)
+        assert stats["percentiles"][95] == pytest.approx(exact["percentiles"][95], abs=0.1)
+    
+    @pytest.mark.parametrize("left,right", [([50], None), (None, [50]), ([50], [50, 90])])
+    def test_merge_rejects_mismatched_percentiles(self, left, right):
+        """Test that merging would not silently leave values out of the quantiles."""
+        accumulator = StatsAccumulator(percentiles=left).update(range(10))
+        other = StatsAccumulator(percentiles=right).update(range(1000, 2000))
+        with pytest.raises(ValueError, match="Cannot merge"):
+            accumulator.merge(other)
+        assert accumulator.count == 10
+    
+    def test_memory_is_bounded(self):
+        """Test that the quantile sketch does not grow with the stream."""
+        accumulator = StatsAccumulator(percentiles=[])
+        for start in range(0, 100000, 1000):
+            accumulator.update(range(start, start + 1000))
+        
+        digest = accumulator._digest
+        assert len(digest.centroids) + len(digest._buffer) < 2000
+        assert accumulator.result()["median"] == pytest.approx(50000, rel=0.01)
+    
+    def test_empty_result(self):
+        """Test that an empty accumulator has no result."""
+        assert StatsAccumulator().result() is None
+        assert StatsAccumulator().merge(StatsAccumulator()).result() is None
+    
+    def test_modes(self):
+        """Test strict and lenient handling of invalid values."""
+        with pytest.raises(ValueError, match="Invalid number: bad"):
+            StatsAccumulator(ProcessingMode.STRICT).update([1, "bad"])
+        
+        lenient = StatsAccumulator(ProcessingMode.LENIENT).update([1, "bad", 3])
+        assert lenient.result()["count"] == 2
+
 # Custom marker usage example
 pytestmark = pytest.mark.data_processing
\ No newline at end of file
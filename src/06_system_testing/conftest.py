@@ -0,0 +1,10 @@
+"""
+Configuration for system testing examples.
+"""
+
+def pytest_configure(config):
+    """Configure custom markers."""
+    config.addinivalue_line(
+        "markers",
+        "slow: marks tests as slow (deselect with '-m \"not slow\"')"
+    )
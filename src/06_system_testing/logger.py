@@ -1,9 +1,21 @@
 """
 Logger utility demonstrating output capturing and warnings.
 """
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import threading
+import time
 import warnings
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Type
 from enum import Enum, auto
 
 class LogLevel(Enum):
@@ -13,52 +25,621 @@ class LogLevel(Enum):
     WARNING = auto()
     ERROR = auto()
 
+_LEVELS = {
+    LogLevel.DEBUG: logging.DEBUG,
+    LogLevel.INFO: logging.INFO,
+    LogLevel.WARNING: logging.WARNING,
+    LogLevel.ERROR: logging.ERROR,
+}
+
+class OverflowPolicy(Enum):
+    """What async logging does when its queue is full."""
+    BLOCK = auto()
+    DROP = auto()
+
+@dataclass
+class AsyncOptions:
+    """Queue log records for a background listener thread to write out.
+    
+    When the queue is full, callers either wait (BLOCK) or the record is
+    dropped and counted (DROP). Queued records are flushed by close() or
+    at interpreter exit.
+    """
+    queue_size: int = 10000
+    overflow: OverflowPolicy = OverflowPolicy.BLOCK
+
+@dataclass
+class FileSinkOptions:
+    """Write records to a buffered, rotating file instead of stderr.
+    
+    The file is rotated once it would exceed max_bytes or is
+    rotate_interval seconds old; the newest backup_count rotated files are
+    kept (all of them if backup_count is 0), gzipped in the background if
+    compress is set.
+    """
+    path: str
+    max_bytes: int = 0
+    rotate_interval: Optional[float] = None
+    backup_count: int = 5
+    compress: bool = False
+
+@dataclass
+class ThrottleOptions:
+    """Sample and rate limit log calls keyed by their message template.
+    
+    Only every sample_every-th call is logged, and at most rate_limit calls
+    per second (with bursts up to burst). Dropped calls are reported as
+    "Suppressed N messages" warnings every summary_interval seconds and on
+    close().
+    """
+    sample_every: int = 1
+    rate_limit: Optional[float] = None
+    burst: Optional[float] = None
+    summary_interval: float = 10.0
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that blocks or drops records when the queue is full."""
+    
+    def __init__(self, log_queue: queue.Queue, policy: OverflowPolicy):
+        """Initialize with a bounded queue and overflow policy."""
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put a record on the queue, applying the overflow policy."""
+        if self.policy == OverflowPolicy.BLOCK:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+# Encodes context values; anything json can't handle falls back to str()
+_encode_any = json.JSONEncoder(separators=(',', ':'), default=str).encode
+_encode_str = json.encoder.encode_basestring_ascii
+
+def _encode_value(value: Any) -> str:
+    """Encode a value as JSON, skipping the encoder for plain str and int."""
+    kind = type(value)
+    if kind is str:
+        return _encode_str(value)
+    if kind is int:
+        return int.__repr__(value)
+    return _encode_any(value)
+
+class _JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line.
+    
+    The logger name and level are encoded once per level and reused as a
+    prefix, and context keys are encoded once and cached, so each record
+    only encodes its message and context values.
+    """
+    
+    def __init__(self, name: str):
+        """Initialize with the logger name baked into the prefix."""
+        super().__init__()
+        self._name_field = '{"logger":' + _encode_value(name)
+        self._prefixes: Dict[int, str] = {}
+        self._keys: Dict[str, str] = {}
+    
+    def _prefix(self, record: logging.LogRecord) -> str:
+        """Return the cached static part of the line for this level."""
+        prefix = self._prefixes.get(record.levelno)
+        if prefix is None:
+            prefix = self._name_field + ',"level":' + _encode_value(record.levelname)
+            self._prefixes[record.levelno] = prefix
+        return prefix
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """Encode a record and its context as a JSON object."""
+        parts = [
+            self._prefix(record),
+            ',"time":', repr(record.created),
+            ',"message":', _encode_str(record.getMessage()),
+        ]
+        context = getattr(record, 'context', None)
+        if context:
+            keys = self._keys
+            for key, value in context.items():
+                encoded = keys.get(key)
+                if encoded is None:
+                    encoded = keys[key] = ',' + _encode_value(key) + ':'
+                parts.append(encoded)
+                parts.append(_encode_value(value))
+        if record.exc_info:
+            parts.append(',"exc_info":')
+            parts.append(_encode_value(self.formatException(record.exc_info)))
+        parts.append('}')
+        return ''.join(parts)
+
+class _BatchingStreamHandler(logging.StreamHandler):
+    """Stream handler that writes formatted records in batches.
+    
+    Records are buffered and handed to a background thread, started with
+    the first record, which writes each batch with a single write() once it
+    holds batch_size records or buffer_size characters or its oldest record
+    is flush_interval seconds old. Callers block only when four buffers'
+    worth is waiting. ERROR (or worse) records, close() and flush() write
+    out whatever is pending on the calling thread.
+    """
+    
+    def __init__(self, stream=None, batch_size: int = 256, flush_interval: float = 1.0,
+                 buffer_size: int = 1 << 16):
+        """Initialize with the batch limits and maximum buffering delay."""
+        super().__init__(stream)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._first_pending = 0.0
+        self._flush_now = False
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+        # Shares the handler lock, so the flusher sees a consistent buffer
+        self._wakeup = threading.Condition(self.lock)
+        # Taken while holding the handler lock, so batches keep their order
+        # even though they are written after the handler lock is released
+        self._io_lock = threading.Lock()
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """Buffer a record, writing the batch out when it is due."""
+        try:
+            line = self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+            return
+        with self._wakeup:
+            pending = self._pending
+            if not pending:
+                self._first_pending = time.monotonic()
+                self._start_flusher()
+                self._wakeup.notify_all()
+            pending.append(line)
+            self._pending_size += len(line)
+            if record.levelno >= logging.ERROR or self._flusher is None:
+                self.flush()
+            elif len(pending) >= self.batch_size or self._pending_size >= self.buffer_size:
+                self._flush_now = True
+                self._wakeup.notify_all()
+                if threading.current_thread() is not self._flusher:
+                    while self._pending_size >= 4 * self.buffer_size and not self._closed:
+                        self._wakeup.wait()
+    
+    def _start_flusher(self) -> None:
+        """Start the interval flush thread if it is not running yet."""
+        if self._flusher is None and not self._closed:
+            self._flusher = threading.Thread(target=self._flush_on_interval,
+                                             name=f"{type(self).__name__}-flusher", daemon=True)
+            self._flusher.start()
+    
+    def _flush_on_interval(self) -> None:
+        """Write out each batch once it is full or flush_interval old."""
+        while True:
+            with self._wakeup:
+                while not self._closed:
+                    if not self._pending:
+                        self._wakeup.wait()
+                        continue
+                    if self._flush_now:
+                        break
+                    remaining = self._first_pending + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                else:
+                    return
+            # Written outside the handler lock, so emitting threads never
+            # wait on the write or on a rotation it triggers
+            self.flush()
+    
+    def _stop_flusher(self) -> None:
+        """Tell the interval flush thread to exit."""
+        # No join: logging.shutdown() calls close() with the handler lock
+        # held, and the flusher checks _closed as soon as it gets the lock.
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+    
+    def _write(self, data: str) -> None:
+        """Write a joined batch to the stream."""
+        self.stream.write(data)
+    
+    def flush(self) -> None:
+        """Write out buffered records and flush the stream."""
+        with self._wakeup:
+            data = ''.join(self._pending)
+            self._pending.clear()
+            self._pending_size = 0
+            self._flush_now = False
+            self._wakeup.notify_all()
+            self._io_lock.acquire()
+        try:
+            if self.stream:
+                if data:
+                    self._write(data)
+                if hasattr(self.stream, "flush"):
+                    self.stream.flush()
+        finally:
+            self._io_lock.release()
+    
+    def close(self) -> None:
+        """Stop the flusher and write out pending records."""
+        self._stop_flusher()
+        self.flush()
+        super().close()
+
+class _RotatingFileSink(_BatchingStreamHandler):
+    """Buffered file handler with size- and time-based rotation.
+    
+    Batches are encoded once and written unbuffered, looping on short
+    writes. Rotation is checked only when a batch is written, which is
+    normally on the flusher thread: the current file is renamed with a
+    timestamp suffix and a fresh one opened. Compressing rotated files and
+    pruning old ones beyond backup_count happen on a second background
+    thread, or inline once that thread is gone at interpreter exit.
+    """
+    
+    def __init__(self, path: str, max_bytes: int = 0, rotate_interval: Optional[float] = None,
+                 backup_count: int = 5, compress: bool = False, encoding: str = 'utf-8',
+                 **batch_options: Any):
+        """
+        Open path for appending.
+        
+        max_bytes=0 and no rotate_interval disable rotation; backup_count=0
+        keeps every rotated file.
+        """
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.encoding = encoding
+        super().__init__(self._open(), **batch_options)
+        self._size = os.fstat(self.stream.fileno()).st_size
+        self._rollover_at = self._next_rollover()
+        self._rotated = re.compile(re.escape(os.path.basename(self.path))
+                                   + r'\.\d{8}-\d{6}-\d{6}(\.gz)?$')
+        self._background = ThreadPoolExecutor(max_workers=1)
+    
+    def _open(self):
+        """Open the log file for unbuffered appending."""
+        return open(self.path, 'ab', buffering=0)
+    
+    def _next_rollover(self) -> Optional[float]:
+        """Return when the current file should be rotated by age."""
+        return time.time() + self.rotate_interval if self.rotate_interval else None
+    
+    def _write(self, data: str) -> None:
+        """Write an encoded batch, rotating first if the file is due."""
+        encoded = data.encode(self.encoding)
+        rotated = self._rollover() if self._should_rollover(len(encoded)) else None
+        view = memoryview(encoded)
+        while view:
+            view = view[self.stream.write(view):]
+        self._size += len(encoded)
+        # Only hand off once the batch is safely in the new file
+        if rotated is not None:
+            try:
+                self._background.submit(self._finish_rotation, rotated)
+            except RuntimeError:
+                # The executor refuses work during interpreter shutdown
+                self._finish_rotation(rotated)
+    
+    def _should_rollover(self, incoming: int) -> bool:
+        """Return True if the file is too big or too old for this batch."""
+        if self.max_bytes and self._size and self._size + incoming > self.max_bytes:
+            return True
+        return self._rollover_at is not None and time.time() >= self._rollover_at
+    
+    def _rollover(self) -> str:
+        """Rename the current file, start a new one and return the old name."""
+        self.stream.close()
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        rotated = f"{self.path}.{stamp}-{int(now * 1e6) % 1000000:06d}"
+        os.replace(self.path, rotated)
+        self.stream = self._open()
+        self._size = 0
+        self._rollover_at = self._next_rollover()
+        return rotated
+    
+    def _finish_rotation(self, rotated: str) -> None:
+        """Compress a rotated file and remove the oldest backups."""
+        if self.compress:
+            tmp = rotated + '.gz.tmp'
+            with open(rotated, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            os.replace(tmp, rotated + '.gz')
+            os.remove(rotated)
+        if self.backup_count:
+            for old in self.rotated_files()[:-self.backup_count]:
+                os.remove(old)
+    
+    def rotated_files(self) -> List[str]:
+        """Return rotated log files, oldest first."""
+        directory = os.path.dirname(self.path)
+        names = sorted(name for name in os.listdir(directory) if self._rotated.match(name))
+        return [os.path.join(directory, name) for name in names]
+    
+    def close(self) -> None:
+        """Flush and close the file, waiting for background compression."""
+        self._stop_flusher()
+        self.acquire()
+        try:
+            if self.stream:
+                self.flush()
+                self.stream.close()
+                self.stream = None
+        finally:
+            self.release()
+        self._background.shutdown(wait=True)
+        logging.StreamHandler.close(self)
+
+class _LogThrottle:
+    """Per-key sampling and token bucket limits for log calls.
+    
+    Only every sample_every-th call per key is considered, and considered
+    calls must also take a token from that key's bucket, which refills at
+    rate tokens per second up to burst (default max(1, rate), so slow rates
+    still let a call through). Rejected calls are counted so a summary can
+    be logged every summary_interval seconds.
+    """
+    
+    def __init__(self, sample_every: int = 1, rate: Optional[float] = None,
+                 burst: Optional[float] = None, summary_interval: float = 10.0,
+                 max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        """Initialize the sampling and rate limit settings."""
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst is None:
+            burst = max(1.0, rate) if rate is not None else 1.0
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.sample_every = sample_every
+        self.rate = rate
+        self.burst = burst
+        self.summary_interval = summary_interval
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [calls seen, tokens, last refill time]
+        self._keys: Dict[str, List[float]] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._next_summary = clock() + summary_interval
+        self._lock = threading.Lock()
+    
+    def allow(self, key: str) -> bool:
+        """Return True if a call with this key should be logged."""
+        with self._lock:
+            now = self.clock()
+            state = self._keys.get(key)
+            if state is None:
+                if len(self._keys) >= self.max_keys:
+                    self._keys.clear()
+                state = self._keys[key] = [0, self.burst, now]
+            state[0] += 1
+            allowed = (state[0] - 1) % self.sample_every == 0
+            if allowed and self.rate is not None:
+                tokens = min(self.burst, state[1] + (now - state[2]) * self.rate)
+                state[2] = now
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    allowed = False
+                state[1] = tokens
+            if not allowed:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return allowed
+    
+    def summary_due(self) -> bool:
+        """Return True once the summary interval has passed."""
+        return self.clock() >= self._next_summary
+    
+    def take_suppressed(self) -> Dict[str, int]:
+        """Return and reset suppressed counts per key, restarting the interval."""
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, {}
+            self._next_summary = self.clock() + self.summary_interval
+            return suppressed
+
+class _WarningRegistry:
+    """Emits each warning key at most once.
+    
+    Repeats are rejected with a set lookup, before any of the warnings
+    machinery (stack inspection, filters, per-module registries) runs.
+    """
+    
+    def __init__(self):
+        """Initialize with no warnings seen."""
+        self._seen: Set[Hashable] = set()
+    
+    def warn(self, key: Hashable, message: str, category: Type[Warning],
+             stacklevel: int = 1) -> bool:
+        """Warn unless key was already warned about; return True if emitted."""
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        warnings.warn(message, category, stacklevel=stacklevel + 1)
+        return True
+    
+    def clear(self) -> None:
+        """Forget which warnings were emitted."""
+        self._seen.clear()
+
+# Shared by deprecated_method(once=True), which has no instance to hold one
+_deprecations = _WarningRegistry()
+
 class Logger:
     """Custom logger with output and warning demonstrations."""
     
-    def __init__(self, name: str):
-        """Initialize logger with name."""
+    def __init__(self, name: str, structured: bool = False,
+                 async_options: Optional[AsyncOptions] = None,
+                 file_sink: Optional[FileSinkOptions] = None,
+                 throttle: Optional[ThrottleOptions] = None, warn_once: bool = False):
+        """
+        Initialize logger with name.
+        
+        Structured loggers write batched JSON lines including any keyword
+        context passed to log(). With warn_once, process_with_warning emits
+        each kind of warning only the first time for this logger.
+        """
         self.name = name
+        self.structured = structured
+        self.async_options = async_options
+        self.file_sink = file_sink
+        self._handler: Optional[logging.Handler] = None
+        self._queue_handler: Optional[_BoundedQueueHandler] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self.warn_once = warn_once
+        self._warnings = _WarningRegistry()
+        self._throttle: Optional[_LogThrottle] = None
+        if throttle is not None:
+            self._throttle = _LogThrottle(throttle.sample_every, throttle.rate_limit,
+                                          throttle.burst, throttle.summary_interval)
         self._setup_logger()
     
     def _setup_logger(self) -> None:
         """Set up the logger configuration."""
         self.logger = logging.getLogger(self.name)
         if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
+            sink = self.file_sink
+            if sink is not None:
+                handler = _RotatingFileSink(
+                    sink.path, sink.max_bytes, sink.rotate_interval,
+                    sink.backup_count, sink.compress
+                )
+            elif self.structured:
+                handler = _BatchingStreamHandler()
+            else:
+                handler = logging.StreamHandler()
+            if self.structured:
+                formatter = _JsonFormatter(self.name)
+            else:
+                formatter = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
             handler.setFormatter(formatter)
+            self._handler = handler
+            if self.async_options is not None:
+                log_queue = queue.Queue(maxsize=self.async_options.queue_size)
+                self._queue_handler = _BoundedQueueHandler(log_queue,
+                                                           self.async_options.overflow)
+                self._listener = logging.handlers.QueueListener(log_queue, handler)
+                self._listener.start()
+                atexit.register(self.close)
+                handler = self._queue_handler
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.DEBUG)
+        
+        self._methods = {
+            LogLevel.DEBUG: self.logger.debug,
+            LogLevel.INFO: self.logger.info,
+            LogLevel.WARNING: self.logger.warning,
+            LogLevel.ERROR: self.logger.error,
+        }
+    
+    @property
+    def dropped(self) -> int:
+        """Number of records dropped because the async queue was full."""
+        return self._queue_handler.dropped if self._queue_handler else 0
+    
+    def close(self) -> None:
+        """Flush pending records, stop the async listener and close the log file."""
+        if self._throttle is not None:
+            self._report_suppressed()
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self.logger.removeHandler(self._queue_handler)
+            atexit.unregister(self.close)
+        if isinstance(self._handler, _RotatingFileSink):
+            self.logger.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+        elif self._handler is not None:
+            self._handler.flush()
+    
+    def enabled(self, level: LogLevel) -> bool:
+        """Return True if messages at this level would be logged."""
+        return self.logger.isEnabledFor(_LEVELS[level])
     
-    def log(self, level: LogLevel, message: str) -> None:
-        """Log a message at the specified level."""
-        if level == LogLevel.DEBUG:
-            self.logger.debug(message)
-        elif level == LogLevel.INFO:
-            self.logger.info(message)
-        elif level == LogLevel.WARNING:
-            self.logger.warning(message)
-        elif level == LogLevel.ERROR:
-            self.logger.error(message)
+    def log(self, level: LogLevel, message: str, *args, **context: Any) -> None:
+        """
+        Log a message at the specified level.
+        
+        Extra args are %-formatted into message only if the record is
+        actually emitted, so disabled levels skip formatting entirely.
+        Keyword context is attached to the record as record.context and
+        written as extra JSON fields in structured mode.
+        """
+        if self._throttle is not None:
+            if not self.logger.isEnabledFor(_LEVELS[level]):
+                return
+            allowed = self._throttle.allow(message)
+            if self._throttle.summary_due():
+                self._report_suppressed()
+            if not allowed:
+                return
+        if context:
+            self._methods[level](message, *args, extra={'context': context})
+        else:
+            self._methods[level](message, *args)
+    
+    def _report_suppressed(self) -> None:
+        """Log how many messages per key were dropped by the throttle."""
+        for key, count in self._throttle.take_suppressed().items():
+            self.logger.warning("Suppressed %d messages like %r", count, key,
+                                extra={'context': {'suppressed': count, 'key': key}})
     
     @staticmethod
-    def deprecated_method(message: Optional[str] = None) -> None:
-        """Example of a deprecated method that raises a warning."""
-        warnings.warn(
-            message or "This method is deprecated",
-            DeprecationWarning,
-            stacklevel=2
-        )
+    def deprecated_method(message: Optional[str] = None, once: bool = False) -> None:
+        """
+        Example of a deprecated method that raises a warning.
+        
+        With once=True, each distinct message is only warned about the
+        first time it is seen in the process.
+        """
+        message = message or "This method is deprecated"
+        if once:
+            _deprecations.warn(message, message, DeprecationWarning, stacklevel=2)
+        else:
+            warnings.warn(message, DeprecationWarning, stacklevel=2)
     
     def print_status(self, status: str) -> None:
         """Print status directly to stdout."""
         print(f"{self.name} Status: {status}")
     
+    def _warn(self, message: str, category: Type[Warning]) -> None:
+        """Warn from a processing method, once per category if warn_once is set."""
+        if self.warn_once:
+            self._warnings.warn(category, message, category, stacklevel=2)
+        else:
+            warnings.warn(message, category, stacklevel=2)
+    
     def process_with_warning(self, value: int) -> int:
         """Process a value with potential warning."""
         if value < 0:
-            warnings.warn("Negative values are deprecated", FutureWarning)
+            self._warn("Negative values are deprecated", FutureWarning)
         elif value == 0:
-            warnings.warn("Zero values may be unsupported in future", PendingDeprecationWarning)
-        return abs(value)
\ No newline at end of file
+            self._warn("Zero values may be unsupported in future", PendingDeprecationWarning)
+        return abs(value)
+    
+    def process_many_with_warning(self, values: Iterable[int]) -> List[int]:
+        """
+        Process many values, warning once per kind with a count.
+        
+        Equivalent to calling process_with_warning on each value, but emits
+        at most one FutureWarning and one PendingDeprecationWarning in total.
+        """
+        values = list(values)
+        results = list(map(abs, values))
+        zeros = results.count(0)
+        negatives = sum(value < 0 for value in values)
+        if negatives:
+            self._warn(f"Negative values are deprecated ({negatives} values)", FutureWarning)
+        if zeros:
+            self._warn(f"Zero values may be unsupported in future ({zeros} values)",
+                       PendingDeprecationWarning)
+        return results
\ No newline at end of file
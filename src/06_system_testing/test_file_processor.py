@@ -1,9 +1,17 @@
 """
 Tests for FileProcessor using temporary files and directories.
 """
+import asyncio
+import io
+import json
+import os
+import random
+import sqlite3
+import time
 import pytest
 from pathlib import Path
-from file_processor import FileProcessor
+import file_processor
+from file_processor import AsyncFileProcessor, FileProcessor, COPY_CHUNK_SIZE
 
 def test_create_backup(tmp_path):
     """Test backup creation with temporary files."""
@@ -20,6 +28,142 @@ def test_create_backup(tmp_path):
     assert backup_file.suffix == ".txt.bak"
     assert backup_file.read_text() == "test content"
 
+@pytest.mark.parametrize("use_copy_file_range", [True, False])
+def test_create_backup_large_file(tmp_path, monkeypatch, use_copy_file_range):
+    """Test chunked backup of a multi-chunk file with and without copy_file_range."""
+    if not use_copy_file_range:
+        monkeypatch.delattr(os, "copy_file_range", raising=False)
+    
+    test_file = tmp_path / "big.log"
+    content = os.urandom(COPY_CHUNK_SIZE * 2 + 123)
+    test_file.write_bytes(content)
+    os.utime(test_file, (1_000_000, 1_000_000))
+    
+    backup_file = FileProcessor(tmp_path).create_backup(test_file)
+    
+    assert backup_file.read_bytes() == content
+    assert backup_file.stat().st_mtime == 1_000_000
+    # No temporary files left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["big.log", "big.log.bak"]
+
+def test_create_backup_copy_file_range_unsupported(tmp_path, monkeypatch):
+    """Test fallback when the kernel rejects copy_file_range mid-way."""
+    def unsupported(src, dst, count):
+        os.write(dst, b"partial")
+        raise OSError("cross-device copy")
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    
+    test_file = tmp_path / "data.txt"
+    test_file.write_text("full content")
+    
+    backup_file = FileProcessor(tmp_path).create_backup(test_file)
+    assert backup_file.read_text() == "full content"
+
+def test_create_backup_failure_keeps_old_backup(tmp_path, monkeypatch):
+    """Test that a failed backup leaves the previous backup untouched."""
+    test_file = tmp_path / "data.txt"
+    test_file.write_text("new content")
+    old_backup = tmp_path / "data.txt.bak"
+    old_backup.write_text("old content")
+    
+    def failing_copy(src, dst, advance=None):
+        raise OSError("disk full")
+    monkeypatch.setattr(FileProcessor, "_copy_contents", staticmethod(failing_copy))
+    
+    with pytest.raises(OSError, match="disk full"):
+        FileProcessor(tmp_path).create_backup(test_file)
+    
+    assert old_backup.read_text() == "old content"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.txt", "data.txt.bak"]
+
+def test_incremental_backup_deduplicates(tmp_path):
+    """Test that a second backup only stores chunks around an edit."""
+    rng = random.Random(0)
+    content = bytes(rng.getrandbits(8) for _ in range(200_000))
+    test_file = tmp_path / "data.bin"
+    test_file.write_bytes(content)
+    
+    processor = FileProcessor(tmp_path)
+    sizes = {"min_size": 1024, "avg_size": 4096, "max_size": 16384}
+    first = processor.create_incremental_backup(test_file, **sizes)
+    first_manifest = json.loads(first.read_text())
+    assert first_manifest["written_chunks"] == len(first_manifest["chunks"]) > 10
+    
+    # Insert bytes near the middle; boundaries resynchronize after the edit
+    edited = content[:100_000] + b"inserted" + content[100_000:]
+    test_file.write_bytes(edited)
+    second = processor.create_incremental_backup(test_file, **sizes)
+    second_manifest = json.loads(second.read_text())
+    assert 1 <= second_manifest["written_chunks"] <= 3
+    
+    restored = processor.restore_backup(first, tmp_path / "first.bin")
+    assert restored.read_bytes() == content
+    restored = processor.restore_backup(second, tmp_path / "second.bin")
+    assert restored.read_bytes() == edited
+
+@pytest.mark.parametrize("sizes", [(64, 256, 1024), (1024, 4096, 16384)])
+def test_chunk_boundaries_match_without_numpy(sizes, monkeypatch):
+    """Test that block and byte-by-byte hashing cut in the same places."""
+    pytest.importorskip("numpy")
+    rng = random.Random(1)
+    content = bytes(rng.getrandbits(8) for _ in range(100_000)) + b"line\n" * 20_000
+    monkeypatch.setattr(file_processor, "COPY_CHUNK_SIZE", 30_000)
+    
+    def chunk(content):
+        return list(file_processor._content_defined_chunks(io.BytesIO(content), *sizes))
+    
+    vectorized = chunk(content)
+    monkeypatch.setattr(file_processor, "np", None)
+    assert chunk(content) == vectorized
+    assert b"".join(vectorized) == content
+    assert len(vectorized) > 10
+
+def test_incremental_backup_unchanged_file(tmp_path, mocker):
+    """Test that an unchanged file reuses its last manifest without being read."""
+    test_file = tmp_path / "data.txt"
+    test_file.write_text("unchanged data " * 1000)
+    processor = FileProcessor(tmp_path)
+    first = json.loads(processor.create_incremental_backup(test_file).read_text())
+    
+    spy = mocker.spy(file_processor, "_content_defined_chunks")
+    second_path = processor.create_incremental_backup(test_file)
+    second = json.loads(second_path.read_text())
+    assert spy.call_count == 0
+    assert second["chunks"] == first["chunks"]
+    assert second["written_chunks"] == 0
+    assert processor.restore_backup(second_path, tmp_path / "out.txt").read_text() == test_file.read_text()
+    
+    # A missing chunk forces a full backup
+    for chunk in (tmp_path / ".backup_store" / "chunks").rglob("*"):
+        if chunk.is_file():
+            chunk.unlink()
+    processor.create_incremental_backup(test_file)
+    assert spy.call_count == 1
+
+def test_incremental_backup_empty_file(tmp_path):
+    """Test backing up and restoring an empty file."""
+    test_file = tmp_path / "empty.txt"
+    test_file.write_bytes(b"")
+    
+    processor = FileProcessor(tmp_path)
+    manifest = processor.create_incremental_backup(test_file, tmp_path / "store")
+    assert json.loads(manifest.read_text())["chunks"] == []
+    assert processor.restore_backup(manifest, tmp_path / "out.txt").read_bytes() == b""
+
+def test_restore_detects_corruption(tmp_path):
+    """Test that a damaged chunk is reported on restore."""
+    test_file = tmp_path / "data.txt"
+    test_file.write_text("important data")
+    
+    processor = FileProcessor(tmp_path)
+    manifest = processor.create_incremental_backup(test_file)
+    digest = json.loads(manifest.read_text())["chunks"][0]
+    chunk = tmp_path / ".backup_store" / "chunks" / digest[:2] / digest
+    chunk.write_text("tampered")
+    
+    with pytest.raises(ValueError, match="Corrupt chunk"):
+        processor.restore_backup(manifest, tmp_path / "restored.txt")
+
 def test_count_lines(tmp_path):
     """Test line counting with temporary files."""
     # Create test file with multiple lines
@@ -29,6 +173,32 @@ def test_count_lines(tmp_path):
     processor = FileProcessor()
     assert processor.count_lines(test_file) == 3
 
+@pytest.mark.parametrize("content,expected", [
+    (b"", 0),
+    (b"no newline", 1),
+    (b"line 1\nline 2", 2),
+    (b"line 1\r\nline 2\r\n", 2),
+    (b"old\rmac\rstyle", 3),
+    (b"\n\n\n", 3),
+    (b"bad utf-8 \xff\nok\n", 2),
+])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_count_lines_line_endings(tmp_path, monkeypatch, content, expected, workers):
+    """Test binary line counting, serially and split across processes."""
+    monkeypatch.setattr(file_processor, "PARALLEL_COUNT_MIN_SIZE", 0)
+    test_file = tmp_path / "lines.txt"
+    test_file.write_bytes(content)
+    
+    assert FileProcessor().count_lines(test_file, workers=workers) == expected
+
+def test_count_lines_crlf_across_blocks(tmp_path, monkeypatch):
+    """Test that a CRLF split between read blocks counts once."""
+    monkeypatch.setattr(file_processor, "COPY_CHUNK_SIZE", 4)
+    test_file = tmp_path / "lines.txt"
+    test_file.write_bytes(b"abc\r\ndef\r\n")
+    
+    assert FileProcessor().count_lines(test_file) == 2
+
 def test_merge_files(tmp_path):
     """Test file merging with temporary files."""
     # Create test files
@@ -49,6 +219,64 @@ def test_merge_files(tmp_path):
     assert "content 1" in content
     assert "content 2" in content
 
+@pytest.mark.parametrize("preallocate", [False, True])
+def test_merge_files_bytes(tmp_path, preallocate):
+    """Test that merging copies bytes exactly, with a newline after each file."""
+    parts = [os.urandom(COPY_CHUNK_SIZE + 7), b"", "caf\u00e9".encode()]
+    files = []
+    for i, content in enumerate(parts):
+        file = tmp_path / f"part{i}.bin"
+        file.write_bytes(content)
+        files.append(file)
+    
+    output_file = tmp_path / "merged.bin"
+    FileProcessor().merge_files(files, output_file, preallocate=preallocate)
+    
+    assert output_file.read_bytes() == b"\n".join(parts) + b"\n"
+
+def test_merge_files_validates_inputs_first(tmp_path):
+    """Test that a missing input leaves an existing output untouched."""
+    present = tmp_path / "present.txt"
+    present.write_text("data")
+    output_file = tmp_path / "merged.txt"
+    output_file.write_text("previous merge")
+    
+    with pytest.raises(FileNotFoundError, match="missing.txt"):
+        FileProcessor().merge_files([present, tmp_path / "missing.txt"], output_file)
+    
+    assert output_file.read_text() == "previous merge"
+
+def test_merge_files_sorted(tmp_path):
+    """Test k-way merging of already sorted log files."""
+    logs = {
+        "a.log": "2024-01-01 a1\n2024-01-03 a2\n",
+        "b.log": "2024-01-02 b1\n2024-01-05 b2",
+        "c.log": "",
+        "d.log": "2024-01-04 d1\n",
+    }
+    files = []
+    for name, content in logs.items():
+        (tmp_path / name).write_text(content)
+        files.append(tmp_path / name)
+    
+    output_file = tmp_path / "merged.log"
+    FileProcessor().merge_files(files, output_file, sorted_merge=True)
+    
+    assert output_file.read_text().splitlines() == [
+        "2024-01-01 a1", "2024-01-02 b1", "2024-01-03 a2", "2024-01-04 d1", "2024-01-05 b2"
+    ]
+
+def test_merge_files_sorted_key(tmp_path):
+    """Test sorted merging with a custom key."""
+    (tmp_path / "x.txt").write_text("3\n20\n")
+    (tmp_path / "y.txt").write_text("5\n100\n")
+    
+    output_file = tmp_path / "merged.txt"
+    FileProcessor().merge_files([tmp_path / "x.txt", tmp_path / "y.txt"], output_file,
+                                sorted_merge=True, key=int)
+    
+    assert output_file.read_text() == "3\n5\n20\n100\n"
+
 def test_search_content(tmp_path):
     """Test content searching in temporary directory."""
     # Create test files with different content
@@ -67,6 +295,193 @@ def test_search_content(tmp_path):
     assert any(file.name == "file1.txt" for file in matches)
     assert any(file.name == "file3.txt" for file in matches)
 
+@pytest.fixture
+def search_tree(tmp_path):
+    """Create a directory tree with text and binary files."""
+    (tmp_path / "file1.txt").write_text("contains target text")
+    (tmp_path / "file2.txt").write_text("different content")
+    (tmp_path / "image.bin").write_bytes(b"\x89PNG\0\0target")
+    subdir = tmp_path / "subdir"
+    subdir.mkdir()
+    (subdir / "file3.txt").write_text("more target text")
+    return tmp_path
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_search_content_parallel(search_tree, workers):
+    """Test searching serially and on a thread pool, skipping binary files."""
+    matches = FileProcessor().search_content(search_tree, "target", workers=workers)
+    assert sorted(file.name for file in matches) == ["file1.txt", "file3.txt"]
+
+def test_search_content_across_blocks(tmp_path, monkeypatch):
+    """Test that a match split between read blocks is found."""
+    monkeypatch.setattr(file_processor, "COPY_CHUNK_SIZE", 8)
+    (tmp_path / "file.txt").write_text("0123456target")
+    
+    matches = FileProcessor().search_content(tmp_path, "target")
+    assert [file.name for file in matches] == ["file.txt"]
+
+def test_search_content_index(search_tree, tmp_path_factory):
+    """Test that the trigram index is reused and refreshed when files change."""
+    index_path = tmp_path_factory.mktemp("index") / "search_index.db"
+    processor = FileProcessor()
+    
+    matches = processor.search_content(search_tree, "target", index_path=index_path)
+    assert sorted(file.name for file in matches) == ["file1.txt", "file3.txt"]
+    assert index_path.exists()
+    
+    # Change a file (different size, so the index notices) and remove another
+    (search_tree / "file2.txt").write_text("now with the target too")
+    (search_tree / "subdir" / "file3.txt").unlink()
+    matches = processor.search_content(search_tree, "target", index_path=index_path)
+    assert sorted(file.name for file in matches) == ["file1.txt", "file2.txt"]
+    
+    index = file_processor._TrigramIndex.load(index_path, search_tree)
+    try:
+        assert sorted(index.entries) == ["file1.txt", "file2.txt", "image.bin"]
+        assert index.entries["image.bin"][3]  # Binary files have no postings
+    finally:
+        index.close()
+
+def test_search_content_index_keeps_filtered_files(search_tree, tmp_path_factory, mocker):
+    """Test that a filtered search does not drop other files from the index."""
+    index_path = tmp_path_factory.mktemp("index") / "search_index.db"
+    processor = FileProcessor()
+    processor.search_content(search_tree, "target", index_path=index_path)
+    
+    spy = mocker.spy(file_processor._TrigramIndex, "_file_trigrams")
+    matches = processor.search_content(search_tree, "target", index_path=index_path,
+                                       exclude=["subdir"])
+    assert [file.name for file in matches] == ["file1.txt"]
+    matches = processor.search_content(search_tree, "target", index_path=index_path)
+    assert sorted(file.name for file in matches) == ["file1.txt", "file3.txt"]
+    assert spy.call_count == 0
+
+def test_search_content_index_unchanged_not_rewritten(search_tree, tmp_path_factory):
+    """Test that a search with nothing to re-index leaves the index file alone."""
+    index_path = tmp_path_factory.mktemp("index") / "search_index.db"
+    processor = FileProcessor()
+    processor.search_content(search_tree, "target", index_path=index_path)
+    before = index_path.stat().st_mtime_ns
+    
+    time.sleep(0.01)
+    processor.search_content(search_tree, "content", index_path=index_path)
+    assert index_path.stat().st_mtime_ns == before
+
+@pytest.mark.parametrize("content", [b'{"files": {}}', None])
+def test_search_content_index_refuses_other_files(search_tree, tmp_path_factory, content):
+    """Test that a file which is not a search index is neither used nor deleted."""
+    index_path = tmp_path_factory.mktemp("index") / "other.db"
+    if content is None:
+        with sqlite3.connect(str(index_path)) as db:
+            db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+            db.execute("INSERT INTO meta VALUES ('root', 'elsewhere')")
+        content = index_path.read_bytes()
+    else:
+        index_path.write_bytes(content)
+    
+    with pytest.raises(ValueError, match="Not a search index"):
+        FileProcessor().search_content(search_tree, "target", index_path=index_path)
+    assert index_path.read_bytes() == content
+
+def test_search_content_index_rebuilds_corrupt(search_tree, tmp_path_factory):
+    """Test that a damaged index written by search_content is rebuilt."""
+    index_path = tmp_path_factory.mktemp("index") / "search_index.db"
+    processor = FileProcessor()
+    processor.search_content(search_tree, "target", index_path=index_path)
+    data = bytearray(index_path.read_bytes())
+    data[100:] = b"\xff" * (len(data) - 100)
+    index_path.write_bytes(bytes(data))
+    
+    matches = processor.search_content(search_tree, "target", index_path=index_path)
+    assert sorted(file.name for file in matches) == ["file1.txt", "file3.txt"]
+
+@pytest.mark.slow
+def test_search_content_index_warm_is_faster(tmp_path_factory):
+    """Test that a warm indexed search beats a plain scan of the same tree."""
+    tree = tmp_path_factory.mktemp("corpus")
+    rng = random.Random(7)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+             for _ in range(5000)]
+    for i in range(30):
+        (tree / f"doc{i}.txt").write_text(" ".join(rng.choice(words) for _ in range(50000)))
+    (tree / "doc7.txt").write_text((tree / "doc7.txt").read_text() + " needle-QXZJ ")
+    index_path = tmp_path_factory.mktemp("index") / "search_index.db"
+    processor = FileProcessor()
+    processor.search_content(tree, "QXZJ", index_path=index_path)
+    
+    def best_time(**options):
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            matches = processor.search_content(tree, "needle-QXZJ", **options)
+            timings.append(time.perf_counter() - start)
+            assert [file.name for file in matches] == ["doc7.txt"]
+        return min(timings)
+    
+    assert best_time(index_path=index_path) < best_time()
+
+def test_search_content_index_skips_files(search_tree, mocker):
+    """Test that files ruled out by the index are never opened for searching."""
+    index_path = search_tree / ".search_index.db"
+    processor = FileProcessor()
+    processor.search_content(search_tree, "warm up", index_path=index_path)
+    
+    spy = mocker.spy(file_processor, "_file_contains")
+    matches = processor.search_content(search_tree, "more target", index_path=index_path)
+    
+    assert [file.name for file in matches] == ["file3.txt"]
+    assert [call.args[0].name for call in spy.call_args_list] == ["file3.txt"]
+
+@pytest.fixture
+def walk_tree(tmp_path):
+    """Create a nested tree of logs, sources and a build directory."""
+    (tmp_path / "app.log").write_text("error: disk")
+    (tmp_path / "big.log").write_text("error: " + "x" * 1000)
+    (tmp_path / "main.py").write_text("print('error')")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "util.py").write_text("no problems")
+    (tmp_path / "src" / "deep").mkdir()
+    (tmp_path / "src" / "deep" / "trace.log").write_text("error: deep")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "out.log").write_text("error: build")
+    return tmp_path
+
+@pytest.mark.parametrize("options,expected", [
+    ({}, ["app.log", "big.log", "build/out.log", "main.py", "src/deep/trace.log", "src/util.py"]),
+    ({"include": ["*.log"]}, ["app.log", "big.log", "build/out.log", "src/deep/trace.log"]),
+    ({"exclude": ["build"]}, ["app.log", "big.log", "main.py", "src/deep/trace.log", "src/util.py"]),
+    ({"include": ["src/*"], "exclude": ["*.log"]}, ["src/util.py"]),
+    ({"max_size": 100, "exclude": ["src"]}, ["app.log", "build/out.log", "main.py"]),
+])
+def test_walk_files(walk_tree, options, expected):
+    """Test scandir walking with include/exclude globs and a size limit."""
+    files = FileProcessor().walk_files(walk_tree, **options)
+    assert sorted(file.relative_to(walk_tree).as_posix() for file in files) == expected
+
+def test_walk_files_not_directory(tmp_path):
+    """Test that walking a file is rejected."""
+    file = tmp_path / "file.txt"
+    file.write_text("data")
+    with pytest.raises(NotADirectoryError):
+        list(FileProcessor().walk_files(file))
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_iter_search_content(walk_tree, workers):
+    """Test streaming search results, serially and on a thread pool."""
+    processor = FileProcessor()
+    matches = processor.iter_search_content(walk_tree, "error:", workers=workers,
+                                            exclude=["build"], max_size=100)
+    
+    first = next(matches)
+    assert first.suffix == ".log"
+    rest = list(matches)
+    assert sorted(file.name for file in [first] + rest) == ["app.log", "trace.log"]
+
+def test_search_content_filters(walk_tree):
+    """Test that search_content accepts the walker filters."""
+    matches = FileProcessor().search_content(walk_tree, "error", include=["*.py"])
+    assert [file.name for file in matches] == ["main.py"]
+
 def test_file_not_found(tmp_path):
     """Test error handling for non-existent files."""
     processor = FileProcessor()
@@ -81,4 +496,63 @@ def test_merge_no_files(tmp_path):
     output_file = tmp_path / "output.txt"
     
     with pytest.raises(ValueError, match="No input files provided"):
-        processor.merge_files([], output_file)
\ No newline at end of file
+        processor.merge_files([], output_file)
+
+def test_async_operations(tmp_path):
+    """Test that the async wrappers return the same results and report progress."""
+    test_file = tmp_path / "data.txt"
+    test_file.write_text("line 1\nline 2\ntarget\n")
+    other_file = tmp_path / "other.txt"
+    other_file.write_text("other")
+    progress = []
+    
+    async def run():
+        async with AsyncFileProcessor(tmp_path, max_workers=2) as processor:
+            backup, lines, _ = await asyncio.gather(
+                processor.create_backup(test_file),
+                processor.count_lines(test_file, progress=lambda done, total: progress.append((done, total))),
+                processor.merge_files([test_file, other_file], tmp_path / "merged.txt"),
+            )
+            matches = await processor.search_content(tmp_path, "target")
+            return backup, lines, matches
+    
+    backup, lines, matches = asyncio.run(run())
+    
+    assert backup.read_text() == test_file.read_text()
+    assert lines == 3
+    assert progress[-1] == (test_file.stat().st_size, test_file.stat().st_size)
+    assert (tmp_path / "merged.txt").read_text() == "line 1\nline 2\ntarget\n\nother\n"
+    assert sorted(file.name for file in matches) == ["data.txt", "data.txt.bak", "merged.txt"]
+
+def test_async_backup_cancellation(tmp_path, monkeypatch):
+    """Test that cancelling a backup stops the worker and leaves no files behind."""
+    monkeypatch.setattr(file_processor, "COPY_CHUNK_SIZE", 1024)
+    real_counter = file_processor._byte_counter
+    
+    def slow_counter(progress, total):
+        # Slow each chunk down so the copy is still running when it is cancelled
+        advance = real_counter(progress, total)
+        def slow_advance(count):
+            time.sleep(0.001)
+            advance(count)
+        return slow_advance
+    monkeypatch.setattr(file_processor, "_byte_counter", slow_counter)
+    
+    test_file = tmp_path / "big.log"
+    test_file.write_bytes(os.urandom(1024 * 1024))
+    
+    async def run():
+        processor = AsyncFileProcessor(tmp_path)
+        started = asyncio.Event()
+        task = asyncio.create_task(
+            processor.create_backup(test_file, progress=lambda done, total: started.set())
+        )
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await processor.aclose()
+    
+    asyncio.run(run())
+    
+    assert [file.name for file in tmp_path.iterdir()] == ["big.log"]
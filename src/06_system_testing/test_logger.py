@@ -1,9 +1,22 @@
 """
 Tests for Logger demonstrating output capturing and warning testing.
 """
+import gzip
+import io
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
 import pytest
 import warnings
-from logger import Logger, LogLevel
+from logger import (AsyncOptions, FileSinkOptions, Logger, LogLevel, OverflowPolicy,
+                    ThrottleOptions, _BatchingStreamHandler,
+                    _BoundedQueueHandler, _JsonFormatter, _LogThrottle,
+                    _RotatingFileSink, _WarningRegistry)
 
 def test_log_output(capsys):
     """Test direct output capture."""
@@ -30,6 +43,31 @@ def test_log_levels(caplog):
     assert "Warning message" in caplog.text
     assert "Error message" in caplog.text
 
+def test_lazy_formatting(caplog):
+    """Test that arguments are only formatted for enabled levels."""
+    class Expensive:
+        calls = 0
+        def __str__(self):
+            Expensive.calls += 1
+            return "expensive"
+    
+    logger = Logger("LazyTestLogger")
+    logger.logger.setLevel(logging.INFO)
+    
+    assert not logger.enabled(LogLevel.DEBUG)
+    assert logger.enabled(LogLevel.INFO)
+    
+    logger.log(LogLevel.DEBUG, "Debug %s", Expensive())
+    assert Expensive.calls == 0
+    assert "Debug" not in caplog.text
+    
+    logger.log(LogLevel.INFO, "Info %s %d", Expensive(), 42)
+    assert Expensive.calls > 0
+    assert "Info expensive 42" in caplog.text
+    
+    logger.log(LogLevel.ERROR, "100% literal")
+    assert "100% literal" in caplog.text
+
 def test_deprecated_method():
     """Test deprecated method warning."""
     logger = Logger("TestLogger")
@@ -73,4 +111,354 @@ def test_warning_filter():
     
     # Verify warnings are back
     with pytest.warns(DeprecationWarning):
-        logger.deprecated_method()
\ No newline at end of file
+        logger.deprecated_method()
+
+def test_async_logging(capsys, caplog):
+    """Test that async mode writes every record once closed."""
+    logger = Logger("AsyncTestLogger", async_options=AsyncOptions())
+    for i in range(100):
+        logger.log(LogLevel.INFO, f"Async message {i}")
+    logger.close()
+    
+    captured = capsys.readouterr()
+    assert captured.err.count("AsyncTestLogger - INFO - Async message") == 100
+    assert "Async message 99" in caplog.text
+    assert logger.dropped == 0
+    # Closing again is harmless
+    logger.close()
+
+def test_async_logging_drop_policy():
+    """Test that a full queue drops and counts records under the DROP policy."""
+    handler = _BoundedQueueHandler(queue.Queue(maxsize=2), OverflowPolicy.DROP)
+    for i in range(5):
+        handler.handle(logging.LogRecord("test", logging.INFO, __file__, 0, f"m{i}", None, None))
+    
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_structured_logging(capsys):
+    """Test that structured mode writes JSON lines with context."""
+    logger = Logger("StructuredTestLogger", structured=True)
+    logger.log(LogLevel.INFO, "User %s logged in", "bob", user_id=7, tags=["a", "b"])
+    logger.log(LogLevel.WARNING, "Plain message")
+    logger.log(LogLevel.DEBUG, "Odd value", value=object())
+    logger.close()
+    
+    lines = capsys.readouterr().err.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 3
+    assert records[0]["logger"] == "StructuredTestLogger"
+    assert records[0]["level"] == "INFO"
+    assert records[0]["message"] == "User bob logged in"
+    assert records[0]["user_id"] == 7
+    assert records[0]["tags"] == ["a", "b"]
+    assert records[1]["level"] == "WARNING"
+    assert "user_id" not in records[1]
+    assert records[2]["value"].startswith("<object")
+
+def test_json_formatter_escaping():
+    """Test that names, messages and keys are escaped as JSON."""
+    formatter = _JsonFormatter('quote"name')
+    record = logging.LogRecord("x", logging.INFO, __file__, 0, 'line\n"two"', None, None)
+    record.context = {'k"ey': "v\u00e9"}
+    
+    decoded = json.loads(formatter.format(record))
+    assert decoded["logger"] == 'quote"name'
+    assert decoded["message"] == 'line\n"two"'
+    assert decoded['k"ey'] == "v\u00e9"
+
+def test_json_formatter_value_types():
+    """Test that context values of every kind encode to their JSON types."""
+    formatter = _JsonFormatter("types")
+    record = logging.LogRecord("x", logging.INFO, __file__, 0, "msg", None, None)
+    record.context = {"int": 10 ** 20, "bool": True, "float": 1.5, "none": None,
+                      "list": [1, "a"], "other": frozenset()}
+    
+    decoded = json.loads(formatter.format(record))
+    assert decoded["int"] == 10 ** 20
+    assert decoded["bool"] is True
+    assert decoded["float"] == 1.5
+    assert decoded["none"] is None
+    assert decoded["list"] == [1, "a"]
+    assert decoded["other"] == "frozenset()"
+
+class ThreadRecordingStream(io.StringIO):
+    """StringIO that remembers which threads wrote to it."""
+    def __init__(self):
+        super().__init__()
+        self.writers = []
+    
+    def write(self, data):
+        self.writers.append(threading.current_thread())
+        return super().write(data)
+
+def wait_for(predicate, timeout=5.0):
+    """Poll predicate until it is true or timeout seconds pass."""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+def test_batching_handler():
+    """Test that full batches are written off the caller's thread and errors inline."""
+    stream = ThreadRecordingStream()
+    handler = _BatchingStreamHandler(stream, batch_size=3, flush_interval=60)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    def emit(level, msg):
+        handler.handle(logging.LogRecord("test", level, __file__, 0, msg, None, None))
+    
+    emit(logging.INFO, "one")
+    emit(logging.INFO, "two")
+    assert stream.getvalue() == ""
+    emit(logging.INFO, "three")
+    assert wait_for(lambda: stream.getvalue() == "one\ntwo\nthree\n")
+    assert stream.writers == [handler._flusher]
+    
+    emit(logging.INFO, "four")
+    emit(logging.ERROR, "five")
+    assert stream.getvalue().endswith("four\nfive\n")
+    assert stream.writers[-1] is threading.current_thread()
+    
+    emit(logging.INFO, "six")
+    handler.flush()
+    assert stream.getvalue().endswith("six\n")
+    handler.close()
+
+def test_batching_handler_interval_flush():
+    """Test that a lone record is written once flush_interval passes."""
+    stream = io.StringIO()
+    handler = _BatchingStreamHandler(stream, batch_size=100, flush_interval=0.05)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.handle(logging.LogRecord("test", logging.WARNING, __file__, 0, "lone", None, None))
+    assert stream.getvalue() == ""
+    assert wait_for(lambda: stream.getvalue() == "lone\n")
+    handler.close()
+
+
+def make_record(msg, level=logging.INFO):
+    """Build a bare log record for handler tests."""
+    return logging.LogRecord("test", level, __file__, 0, msg, None, None)
+
+def test_file_logging(tmp_path):
+    """Test that a file-backed logger writes buffered records on close."""
+    log_file = tmp_path / "app.log"
+    logger = Logger("FileTestLogger", structured=True,
+                    file_sink=FileSinkOptions(str(log_file)))
+    for i in range(10):
+        logger.log(LogLevel.INFO, "File message", index=i)
+    logger.close()
+    
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [r["index"] for r in records] == list(range(10))
+    # Closing again is harmless
+    logger.close()
+
+def test_file_sink_size_rotation(tmp_path):
+    """Test that the file is rotated before it would exceed max_bytes."""
+    log_file = tmp_path / "app.log"
+    sink = _RotatingFileSink(str(log_file), max_bytes=50, backup_count=0, batch_size=1)
+    sink.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(10):
+        sink.handle(make_record(f"message {i:02d}"))
+        sink.flush()
+    sink.close()
+    
+    rotated = sink.rotated_files()
+    assert len(rotated) >= 2
+    contents = [open(path).read() for path in rotated] + [log_file.read_text()]
+    assert all(len(text) <= 50 for text in contents)
+    lines = "".join(contents).splitlines()
+    assert lines == [f"message {i:02d}" for i in range(10)]
+
+def test_file_sink_time_rotation_with_compression(tmp_path):
+    """Test age-based rotation, background gzip and backup pruning."""
+    log_file = tmp_path / "app.log"
+    sink = _RotatingFileSink(str(log_file), rotate_interval=0.01, backup_count=2,
+                             compress=True, batch_size=1)
+    sink.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(4):
+        sink.handle(make_record(f"message {i}"))
+        sink.flush()
+        time.sleep(0.02)
+    sink.handle(make_record("last"))
+    sink.close()
+    
+    rotated = sink.rotated_files()
+    assert len(rotated) == 2
+    assert all(path.endswith(".gz") for path in rotated)
+    assert not list(tmp_path.glob("*.tmp"))
+    with gzip.open(rotated[-1], "rt") as f:
+        assert f.read() == "message 3\n"
+    assert log_file.read_text() == "last\n"
+
+class ShortWriteFile:
+    """Raw file wrapper that writes at most a few bytes per call."""
+    def __init__(self, raw):
+        self.raw = raw
+    
+    def write(self, data):
+        return self.raw.write(data[:7])
+    
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+class ShortWriteSink(_RotatingFileSink):
+    """File sink whose file accepts only short writes."""
+    def _open(self):
+        return ShortWriteFile(super()._open())
+
+def test_file_sink_short_writes(tmp_path):
+    """Test that short writes are retried until the whole batch is written."""
+    log_file = tmp_path / "app.log"
+    sink = ShortWriteSink(str(log_file), batch_size=100)
+    sink.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(20):
+        sink.handle(make_record(f"message {i:02d}"))
+    sink.close()
+    
+    assert log_file.read_text().splitlines() == [f"message {i:02d}" for i in range(20)]
+
+ROTATE_AT_EXIT = """
+from logger import FileSinkOptions, Logger, LogLevel
+logger = Logger("ExitLogger", file_sink=FileSinkOptions({path!r}, max_bytes=200,
+                                                        compress=True))
+for i in range(3):
+    logger.log(LogLevel.INFO, "first record %d padded out to some length", i)
+logger._handler.flush()
+for i in range(3):
+    logger.log(LogLevel.INFO, "final record %d", i)
+"""
+
+def test_file_sink_rotation_at_exit(tmp_path):
+    """Test that a rotation due during interpreter shutdown keeps the last batch."""
+    log_file = tmp_path / "app.log"
+    result = subprocess.run([sys.executable, "-c", ROTATE_AT_EXIT.format(path=str(log_file))],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, timeout=60)
+    
+    assert result.returncode == 0
+    assert result.stderr == ""
+    assert log_file.read_text().splitlines() == [
+        f"ExitLogger - INFO - final record {i}" for i in range(3)]
+    rotated = list(tmp_path.glob("app.log.*"))
+    assert len(rotated) == 1 and rotated[0].suffix == ".gz"
+
+
+def test_throttle_sampling():
+    """Test that only every n-th call per key is allowed."""
+    throttle = _LogThrottle(sample_every=3)
+    allowed = [throttle.allow("a") for _ in range(7)]
+    assert allowed == [True, False, False, True, False, False, True]
+    # Keys are sampled independently
+    assert throttle.allow("b")
+    assert throttle.take_suppressed() == {"a": 4}
+    assert throttle.take_suppressed() == {}
+
+def test_throttle_rate_limit():
+    """Test the per-key token bucket and summary interval."""
+    now = [0.0]
+    throttle = _LogThrottle(rate=2, burst=2, summary_interval=5, clock=lambda: now[0])
+    assert [throttle.allow("a") for _ in range(4)] == [True, True, False, False]
+    assert throttle.allow("b")
+    now[0] = 0.5
+    assert throttle.allow("a")
+    assert not throttle.allow("a")
+    assert not throttle.summary_due()
+    now[0] = 5
+    assert throttle.summary_due()
+    assert throttle.take_suppressed() == {"a": 3}
+    assert not throttle.summary_due()
+
+def test_throttle_invalid_settings():
+    """Test that invalid throttle settings are rejected."""
+    with pytest.raises(ValueError):
+        _LogThrottle(sample_every=0)
+    with pytest.raises(ValueError):
+        _LogThrottle(rate=0)
+    with pytest.raises(ValueError):
+        _LogThrottle(rate=0.5, burst=0.5)
+
+def test_throttle_slow_rate():
+    """Test that rates below one call per second still let calls through."""
+    now = [0.0]
+    throttle = _LogThrottle(rate=0.5, clock=lambda: now[0])
+    assert throttle.allow("a")
+    assert not throttle.allow("a")
+    now[0] = 2
+    assert throttle.allow("a")
+
+def test_slow_rate_limited_logging(caplog):
+    """Test that a logger limited to one call every two seconds still logs."""
+    logger = Logger("SlowThrottledTestLogger", throttle=ThrottleOptions(rate_limit=0.5))
+    logger.log(LogLevel.ERROR, "Disk full")
+    logger.log(LogLevel.ERROR, "Disk full")
+    logger.close()
+    
+    assert len([r for r in caplog.records if r.getMessage() == "Disk full"]) == 1
+
+def test_rate_limited_logging(caplog):
+    """Test that a storm of errors is limited and summarized."""
+    logger = Logger("ThrottledTestLogger",
+                    throttle=ThrottleOptions(rate_limit=1, burst=5))
+    for i in range(1000):
+        logger.log(LogLevel.ERROR, "Request %d failed", i)
+    logger.log(LogLevel.INFO, "Other message")
+    logger.close()
+    
+    assert len([r for r in caplog.records if r.levelno == logging.ERROR]) == 5
+    assert "Other message" in caplog.text
+    assert "Suppressed 995 messages like 'Request %d failed'" in caplog.text
+
+
+def test_warning_registry():
+    """Test that each key is only warned about once."""
+    registry = _WarningRegistry()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        assert registry.warn("a", "first", UserWarning)
+        assert not registry.warn("a", "first again", UserWarning)
+        assert registry.warn("b", "second", UserWarning)
+        registry.clear()
+        assert registry.warn("a", "after clear", UserWarning)
+    
+    assert [str(w.message) for w in caught] == ["first", "second", "after clear"]
+    assert caught[0].filename == __file__
+
+def test_warn_once():
+    """Test that warn_once deduplicates processing warnings per logger."""
+    logger = Logger("TestLogger", warn_once=True)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        for value in [-1, -2, 0, 0, 3]:
+            logger.process_with_warning(value)
+    
+    assert [w.category for w in caught] == [FutureWarning, PendingDeprecationWarning]
+
+def test_deprecated_method_once():
+    """Test that once=True only warns the first time per message."""
+    message = "Once-only deprecation"
+    with pytest.warns(DeprecationWarning, match=message):
+        Logger.deprecated_method(message, once=True)
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        Logger.deprecated_method(message, once=True)
+
+def test_process_many_with_warning():
+    """Test batch processing with aggregate warning counts."""
+    logger = Logger("TestLogger")
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        result = logger.process_many_with_warning([-3, 0, 2, -1, 0, 0])
+    
+    assert result == [3, 0, 2, 1, 0, 0]
+    messages = {w.category: str(w.message) for w in caught}
+    assert len(caught) == 2
+    assert messages[FutureWarning] == "Negative values are deprecated (2 values)"
+    assert messages[PendingDeprecationWarning] == "Zero values may be unsupported in future (3 values)"
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert logger.process_many_with_warning(iter([1, 2])) == [1, 2]
@@ -1,11 +1,19 @@
 """
 Order processing system demonstrating different test categories.
 """
+import asyncio
 import time
 import platform
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 from enum import Enum, auto
+from operator import mul
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class OrderStatus(Enum):
     """Possible states for an order."""
@@ -64,9 +72,126 @@ class OrderProcessor:
             order.status = OrderStatus.FAILED
             return False
     
-    def bulk_process(self, orders: List[Order]) -> List[bool]:
-        """Process multiple orders."""
-        return [self.process_order(order) for order in orders]
+    async def process_order_async(self, order: Order) -> bool:
+        """Process an order like process_order, without blocking the event loop."""
+        if not order.items:
+            raise ValueError("Order must contain items")
+        
+        await asyncio.sleep(0.1)
+        
+        try:
+            order.total = sum(item.quantity * item.price for item in order.items)
+            order.status = OrderStatus.PROCESSING
+            
+            await asyncio.sleep(0.2 if self.platform == "Windows" else 0.1)
+            
+            order.status = OrderStatus.COMPLETED
+            return True
+        
+        except Exception:
+            order.status = OrderStatus.FAILED
+            return False
+    
+    def _process_or_fail(self, order: Order) -> bool:
+        """Process an order, marking it FAILED instead of raising."""
+        try:
+            return self.process_order(order)
+        except Exception:
+            order.status = OrderStatus.FAILED
+            return False
+    
+    def bulk_process(self, orders: List[Order], max_workers: int = 1) -> List[bool]:
+        """
+        Process multiple orders.
+        
+        With max_workers > 1, orders are processed concurrently on a thread
+        pool. Results keep the order of the input, and an order that raises
+        is marked FAILED with a False result instead of aborting the batch.
+        """
+        if max_workers <= 1 or len(orders) <= 1:
+            return [self.process_order(order) for order in orders]
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(orders))) as executor:
+            return list(executor.map(self._process_or_fail, orders))
+    
+    async def bulk_process_async(self, orders: List[Order], max_concurrency: int = 100) -> List[bool]:
+        """
+        Process multiple orders concurrently on the event loop.
+        
+        At most max_concurrency orders are in flight at once. Results keep
+        the order of the input, and an order that raises is marked FAILED
+        with a False result.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        results = [False] * len(orders)
+        pending = iter(enumerate(orders))
+        
+        async def worker() -> None:
+            # Workers share one iterator, so each order is taken exactly once
+            for index, order in pending:
+                try:
+                    results[index] = await self.process_order_async(order)
+                except Exception:
+                    order.status = OrderStatus.FAILED
+        
+        await asyncio.gather(*(worker() for _ in range(min(max_concurrency, len(orders)))))
+        return results
+    
+    @staticmethod
+    def totals_from_arrays(quantities: Sequence[float], prices: Sequence[float],
+                           offsets: Sequence[int]) -> List[float]:
+        """
+        Compute order totals from flat item arrays.
+        
+        Items of order i are quantities[offsets[i]:offsets[i + 1]] and the
+        matching prices, so offsets has one more entry than there are
+        orders; items outside offsets[0]:offsets[-1] are ignored. With
+        NumPy, all totals are computed in one vectorized pass, about ten
+        times faster than the Python loop on arrays that are already packed.
+        """
+        if len(offsets) < 2:
+            return []
+        if np is not None:
+            offsets = np.asarray(offsets, dtype=np.intp)
+            items = slice(offsets[0], offsets[-1])
+            amounts = (np.asarray(quantities, dtype=np.float64)[items]
+                       * np.asarray(prices, dtype=np.float64)[items])
+            # Label each item with its order and sum the amounts per label
+            order_ids = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+            return np.bincount(order_ids, weights=amounts, minlength=len(offsets) - 1).tolist()
+        
+        return [
+            float(sum(map(mul, quantities[start:end], prices[start:end])))
+            for start, end in zip(offsets, offsets[1:])
+        ]
+    
+    def compute_totals(self, orders: List[Order]) -> List[float]:
+        """
+        Compute and set the total of every order in one batch.
+        
+        With NumPy, items are packed into flat quantity and price arrays with
+        per-order offsets for totals_from_arrays. Packing from Order objects
+        costs about as much as summing them in Python, so this is no faster
+        than a per-order loop; callers that already hold packed arrays should
+        use totals_from_arrays directly. Orders without items get a total
+        of 0.
+        """
+        if np is None:
+            # Without NumPy, packing only adds work over summing in place
+            totals = [float(sum(item.quantity * item.price for item in order.items)) for order in orders]
+        else:
+            items = [item for order in orders for item in order.items]
+            offsets = [0]
+            for order in orders:
+                offsets.append(offsets[-1] + len(order.items))
+            quantities = np.fromiter((item.quantity for item in items), dtype=np.float64, count=len(items))
+            prices = np.fromiter((item.price for item in items), dtype=np.float64, count=len(items))
+            totals = self.totals_from_arrays(quantities, prices, offsets)
+        
+        for order, total in zip(orders, totals):
+            order.total = total
+        return totals
     
     def validate_order(self, order: Order) -> bool:
         """Validate order details."""
@@ -80,4 +205,110 @@ class OrderProcessor:
             if item.quantity <= 0 or item.price < 0:
                 return False
         
-        return True
\ No newline at end of file
+        return True
+
+class OrderPipeline:
+    """
+    Processes orders through asyncio stages connected by bounded queues.
+    
+    Each stage (validate, price, fulfil, complete) has its own pool of
+    workers, so a slow stage can be given more workers than the rest.
+    Queues hold at most queue_size orders, so when a stage falls behind
+    the stages before it (and ingestion) wait instead of buffering.
+    """
+    
+    STAGES = ("validate", "price", "fulfil", "complete")
+    
+    def __init__(self, processor: OrderProcessor, workers: Optional[Dict[str, int]] = None,
+                 default_workers: int = 10, queue_size: int = 100):
+        """Initialize with per-stage worker counts and the queue bound."""
+        workers = workers or {}
+        unknown = set(workers) - set(self.STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {sorted(unknown)}")
+        self.processor = processor
+        self.workers = {stage: workers.get(stage, default_workers) for stage in self.STAGES}
+        if min(self.workers.values()) < 1:
+            raise ValueError("Each stage needs at least one worker")
+        if queue_size < 1:
+            # asyncio.Queue treats maxsize <= 0 as unbounded
+            raise ValueError("queue_size must be at least 1")
+        self.queue_size = queue_size
+    
+    async def _validate(self, order: Order) -> bool:
+        """Reject orders that fail validation."""
+        return self.processor.validate_order(order)
+    
+    async def _price(self, order: Order) -> bool:
+        """Compute the order total and mark it as processing."""
+        await asyncio.sleep(0.1)
+        order.total = sum(item.quantity * item.price for item in order.items)
+        order.status = OrderStatus.PROCESSING
+        return True
+    
+    async def _fulfil(self, order: Order) -> bool:
+        """Simulate fulfilment, which is slower on Windows."""
+        await asyncio.sleep(0.2 if self.processor.platform == "Windows" else 0.1)
+        return True
+    
+    async def _complete(self, order: Order) -> bool:
+        """Mark the order as completed."""
+        order.status = OrderStatus.COMPLETED
+        return True
+    
+    async def _worker(self, stage: Callable[[Order], Awaitable[bool]],
+                      inbox: "asyncio.Queue[Tuple[int, Order]]",
+                      outbox: Optional["asyncio.Queue[Tuple[int, Order]]"],
+                      results: Dict[int, bool]) -> None:
+        """Run one stage on orders from inbox, passing survivors to outbox."""
+        while True:
+            index, order = await inbox.get()
+            try:
+                try:
+                    passed = await stage(order)
+                except Exception:
+                    passed = False
+                if not passed:
+                    order.status = OrderStatus.FAILED
+                    results[index] = False
+                elif outbox is None:
+                    results[index] = True
+                else:
+                    # Waits while the next stage is full, pushing back on this one
+                    await outbox.put((index, order))
+            finally:
+                inbox.task_done()
+    
+    async def run(self, orders: Iterable[Order]) -> List[bool]:
+        """
+        Process orders through every stage.
+        
+        Orders are pulled from the iterable only as the first queue has
+        room. Results keep the input order; orders rejected or raising in
+        any stage are marked FAILED with a False result.
+        """
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.STAGES]
+        results: Dict[int, bool] = {}
+        tasks = []
+        for position, name in enumerate(self.STAGES):
+            stage = getattr(self, f"_{name}")
+            outbox = queues[position + 1] if position + 1 < len(queues) else None
+            for _ in range(self.workers[name]):
+                tasks.append(asyncio.ensure_future(
+                    self._worker(stage, queues[position], outbox, results)
+                ))
+        
+        count = 0
+        try:
+            for order in orders:
+                await queues[0].put((count, order))
+                count += 1
+            # Each queue is empty once the ones before it are drained
+            for stage_queue in queues:
+                await stage_queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        return [results.get(index, False) for index in range(count)]
@@ -1,9 +1,12 @@
 """
 Tests demonstrating different test categories and execution strategies.
 """
+import asyncio
+import time
 import pytest
 import platform
-from order_processor import OrderProcessor, Order, OrderItem, OrderStatus
+import order_processor
+from order_processor import OrderProcessor, OrderPipeline, Order, OrderItem, OrderStatus
 
 # Test data
 SAMPLE_ORDER = Order(
@@ -33,6 +36,123 @@ def test_bulk_processing(processor):
     assert all(results)
     assert all(order.status == OrderStatus.COMPLETED for order in orders)
 
+def make_orders(count):
+    """Build valid orders plus one with no items, which fails processing."""
+    orders = [Order(str(i), f"c{i}", [OrderItem(f"p{i}", i + 1, 10.0)]) for i in range(count)]
+    orders.insert(count // 2, Order("bad", "c", []))
+    return orders
+
+def check_bulk_results(orders, results):
+    """Check that results line up with orders and the bad order failed."""
+    for order, result in zip(orders, results):
+        if order.items:
+            assert result
+            assert order.status == OrderStatus.COMPLETED
+            assert order.total == float(order.items[0].quantity * 10)
+        else:
+            assert not result
+            assert order.status == OrderStatus.FAILED
+
+def test_bulk_processing_threaded(processor):
+    """Test concurrent bulk processing on a thread pool."""
+    orders = make_orders(10)
+    start = time.perf_counter()
+    results = processor.bulk_process(orders, max_workers=11)
+    elapsed = time.perf_counter() - start
+    
+    assert len(results) == len(orders)
+    check_bulk_results(orders, results)
+    # Sequential processing would take over 2 seconds
+    assert elapsed < 1.5
+
+def test_bulk_processing_async(processor):
+    """Test concurrent bulk processing on the event loop."""
+    orders = make_orders(20)
+    start = time.perf_counter()
+    results = asyncio.run(processor.bulk_process_async(orders, max_concurrency=7))
+    elapsed = time.perf_counter() - start
+    
+    assert len(results) == len(orders)
+    check_bulk_results(orders, results)
+    # 21 orders in waves of 7 take about 3 rounds of 0.2s
+    assert 0.5 < elapsed < 2.0
+    
+    assert asyncio.run(processor.bulk_process_async([])) == []
+    with pytest.raises(ValueError):
+        asyncio.run(processor.bulk_process_async(orders, max_concurrency=0))
+
+def test_pipeline_processing(processor):
+    """Test that the pipeline completes valid orders and fails the rest."""
+    orders = make_orders(20)
+    orders.append(Order("zero", "c", [OrderItem("p", 0, 10.0)]))
+    pipeline = OrderPipeline(processor, workers={"validate": 2, "complete": 1})
+    start = time.perf_counter()
+    results = asyncio.run(pipeline.run(orders))
+    elapsed = time.perf_counter() - start
+    
+    assert len(results) == len(orders)
+    check_bulk_results(orders[:-1], results[:-1])
+    assert not results[-1]
+    assert orders[-1].status == OrderStatus.FAILED
+    # Two 0.1s stages with 10 workers each handle 20 orders in a few rounds
+    assert elapsed < 1.5
+
+def test_pipeline_backpressure(processor):
+    """Test that ingestion waits for the pipeline instead of buffering."""
+    pulled = []
+    
+    def order_stream():
+        for i in range(15):
+            in_flight = [o for o in pulled if o.status != OrderStatus.COMPLETED]
+            # Four queues and four workers, plus the order being put
+            assert len(in_flight) <= 9
+            order = Order(str(i), "c", [OrderItem("p", 1, 1.0)])
+            pulled.append(order)
+            yield order
+    
+    pipeline = OrderPipeline(processor, default_workers=1, queue_size=1)
+    results = asyncio.run(pipeline.run(order_stream()))
+    assert results == [True] * 15
+
+def test_pipeline_invalid_workers(processor):
+    """Test that bad stage configuration is rejected."""
+    with pytest.raises(ValueError, match="Unknown pipeline stages"):
+        OrderPipeline(processor, workers={"ship": 2})
+    with pytest.raises(ValueError):
+        OrderPipeline(processor, workers={"price": 0})
+    for queue_size in (0, -1):
+        with pytest.raises(ValueError, match="queue_size"):
+            OrderPipeline(processor, queue_size=queue_size)
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_compute_totals(processor, monkeypatch, use_numpy):
+    """Test batch totals match per-order totals and are written back."""
+    if not use_numpy:
+        monkeypatch.setattr(order_processor, "np", None)
+    orders = [
+        Order(str(i), "c", [OrderItem(f"p{j}", j + 1, 0.1 * (i + j + 1)) for j in range(i % 4)])
+        for i in range(50)
+    ]
+    expected = [float(sum(item.quantity * item.price for item in order.items)) for order in orders]
+    
+    totals = processor.compute_totals(orders)
+    assert totals == expected
+    assert [order.total for order in orders] == expected
+    assert orders[0].total == 0.0
+    assert processor.compute_totals([]) == []
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_totals_from_arrays(monkeypatch, use_numpy):
+    """Test totals from pre-packed flat arrays."""
+    if not use_numpy:
+        monkeypatch.setattr(order_processor, "np", None)
+    quantities, prices = [2, 1, 3, 1], [10.0, 20.0, 1.5, 0.5]
+    assert OrderProcessor.totals_from_arrays(quantities, prices, [0, 2, 2, 4]) == [40.0, 0.0, 5.0]
+    # Offsets may cover only part of the items
+    assert OrderProcessor.totals_from_arrays(quantities, prices, [0, 2]) == [40.0]
+    assert OrderProcessor.totals_from_arrays(quantities, prices, [1, 3]) == [24.5]
+    assert OrderProcessor.totals_from_arrays(quantities, prices, [0]) == []
+
 @pytest.mark.integration
 def test_order_processing_flow(processor):
     """Test complete order processing flow."""